@@ -60,26 +60,11 @@ def main():
         for person in people
     }
 
-    # Loop over all sets of people who might have the trait
-    names = set(people)
-    for have_trait in powerset(names):
-
-        # Check if current set of people violates known information
-        fails_evidence = any(
-            (people[person]["trait"] is not None and
-             people[person]["trait"] != (person in have_trait))
-            for person in names
-        )
-        if fails_evidence:
-            continue
-
-        # Loop over all sets of people who might have the gene
-        for one_gene in powerset(names):
-            for two_genes in powerset(names - one_gene):
+    # Loop over all gene and trait assignments consistent with known information
+    for one_gene, two_genes, have_trait, p in consistent_assignments(people):
 
-                # Update probabilities with new joint probability
-                p = joint_probability(people, one_gene, two_genes, have_trait)
-                update(probabilities, one_gene, two_genes, have_trait, p)
+        # Update probabilities with new joint probability
+        update(probabilities, one_gene, two_genes, have_trait, p)
 
     # Ensure probabilities sum to 1
     normalize(probabilities)
@@ -168,6 +153,40 @@ def num_genes_of_person(person, one_gene, two_genes):
         return 0
     
 
+def person_probability(people, person, one_gene, two_genes, has_trait):
+    """
+    Compute the factor of the joint probability contributed by `person`:
+    the probability of their number of genes (given their parents' genes,
+    if known) multiplied by the probability of `has_trait`.
+    """
+    # Want to calculate probability that person has num_genes
+    num_genes = num_genes_of_person(person, one_gene, two_genes)
+
+    # No parental information - use unconditional probability
+    if people[person]['mother'] is None and people[person]['father'] is None:
+        return PROBS["gene"][num_genes] * PROBS["trait"][num_genes][has_trait]
+
+    # Parental information provided - use conditional probability
+    num_genes_mother = num_genes_of_person(people[person]['mother'], one_gene, two_genes)
+    num_genes_father = num_genes_of_person(people[person]['father'], one_gene, two_genes)
+
+    # Only 1 way to inherit 0 copies: inherit 0 copies from each parent
+    if num_genes == 0:
+        probability = probability_inheritence(num_genes_mother, False) * probability_inheritence(num_genes_father, False)
+
+    # Two ways to inherit 1 copy: 1 from mother and 0 from father, or vice versa
+    elif num_genes == 1:
+        probability = probability_inheritence(num_genes_mother, True) * probability_inheritence(num_genes_father, False) \
+                        + probability_inheritence(num_genes_mother, False) * probability_inheritence(num_genes_father, True)
+
+    # Only 1 way to inherit 2 copies: inherit 1 copy from each parent
+    else:
+        probability = probability_inheritence(num_genes_mother, True) * probability_inheritence(num_genes_father, True)
+
+    # Multiply by probability of having the trait
+    return probability * PROBS["trait"][num_genes][has_trait]
+
+
 def joint_probability(people, one_gene, two_genes, have_trait):
     """
     Compute and return a joint probability.
@@ -183,39 +202,75 @@ def joint_probability(people, one_gene, two_genes, have_trait):
     probability = 1
 
     for person in people:
+        probability *= person_probability(people, person, one_gene, two_genes, person in have_trait)
 
-        # Want to calculate probability that person has num_genes
-        num_genes = num_genes_of_person(person, one_gene, two_genes)
+    return probability
 
-        # Want to calculate probability that person has_trait
-        has_trait = person in have_trait
 
-        # No parental information - use unconditional probability
-        if people[person]['mother'] is None and people[person]['father'] is None:
-            probability *= PROBS["gene"][num_genes] * PROBS["trait"][num_genes][has_trait]
+def parents_first(people):
+    """
+    Return a list of the names in `people` ordered so that every
+    person comes after both of their parents.
+    """
+    order = []
 
-        # Parental information provided - use conditional probability
-        else:
-            num_genes_mother = num_genes_of_person(people[person]['mother'], one_gene, two_genes)
-            num_genes_father = num_genes_of_person(people[person]['father'], one_gene, two_genes)
-
-            # Only 1 way to inherit 0 copies: inherit 0 copies from each parent
-            if num_genes == 0:
-                probability *= probability_inheritence(num_genes_mother, False) * probability_inheritence(num_genes_father, False)
-            
-            # Two ways to inherit 1 copy: 1 from mother and 0 from father, or vice versa
-            elif num_genes == 1:
-                probability *= probability_inheritence(num_genes_mother, True) * probability_inheritence(num_genes_father, False) \
-                                + probability_inheritence(num_genes_mother, False) * probability_inheritence(num_genes_father, True)
-            
-            # Only 1 way to inherit 2 copies: inherit 1 copy from each parent
-            elif num_genes == 2:
-                probability *= probability_inheritence(num_genes_mother, True) * probability_inheritence(num_genes_father, True)
-
-            # Multiply by probability of having the trait
-            probability *= PROBS["trait"][num_genes][has_trait]
+    def visit(person):
+        if person in order:
+            return
+        for parent in (people[person]["mother"], people[person]["father"]):
+            if parent is not None:
+                visit(parent)
+        order.append(person)
 
-    return probability
+    for person in people:
+        visit(person)
+    return order
+
+
+def consistent_assignments(people):
+    """
+    Generate every `(one_gene, two_genes, have_trait, p)` assignment that
+    agrees with the known traits in `people`, where `p` is its joint
+    probability (as returned by `joint_probability`).
+
+    People are assigned parents first, so each person's factor of the
+    joint probability is known as soon as they are assigned, and any
+    branch whose probability has already reached zero is cut off.
+    People with a known trait are only assigned that trait.
+    """
+    order = parents_first(people)
+    one_gene = set()
+    two_genes = set()
+    have_trait = set()
+
+    def assign(index, probability):
+
+        # Everyone assigned - yield a copy of the completed assignment
+        if index == len(order):
+            yield set(one_gene), set(two_genes), set(have_trait), probability
+            return
+
+        person = order[index]
+        known_trait = people[person]["trait"]
+        traits = [True, False] if known_trait is None else [known_trait]
+
+        for genes in (one_gene, two_genes, None):
+            if genes is not None:
+                genes.add(person)
+            for has_trait in traits:
+                p = probability * person_probability(people, person, one_gene, two_genes, has_trait)
+
+                # Prune branches that can no longer contribute
+                if p == 0:
+                    continue
+                if has_trait:
+                    have_trait.add(person)
+                yield from assign(index + 1, p)
+                have_trait.discard(person)
+            if genes is not None:
+                genes.remove(person)
+
+    yield from assign(0, 1)
 
 
 def update(probabilities, one_gene, two_genes, have_trait, p):
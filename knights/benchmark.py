@@ -0,0 +1,163 @@
+import random
+import sys
+import time
+
+from logic import *
+
+# Largest number of symbols each enumerating engine is run on
+ENUMERATION_LIMIT = 16
+TRUTH_TABLE_LIMIT = 22
+
+# Number of symbols queried in each knowledge base, besides the
+# negation of the first symbol
+QUERIES = 10
+
+
+def main():
+
+    # Check for proper usage
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python benchmark.py [seed]")
+    seed = int(sys.argv[1]) if len(sys.argv) == 2 else 0
+
+    problems = [
+        (f"3-SAT, {n} symbols", *random_ksat(n, seed=seed))
+        for n in [10, 16, 20, 50, 100]
+    ] + [
+        (f"Knights, {n} speakers", *knights_puzzle(n, seed=seed))
+        for n in [3, 8, 10, 50, 200]
+    ] + [
+        ("Clause already satisfied", *satisfied_clause()),
+    ]
+
+    for name, knowledge, symbols in problems:
+        print(name)
+        queries = [Not(symbols[0])] + symbols[:QUERIES]
+        answers = dict()
+        for engine, check in engines(symbols):
+            start = time.perf_counter()
+            answers[engine] = check(knowledge, queries)
+            seconds = time.perf_counter() - start
+            print(f"    {engine:<22}{seconds * 1000:10.2f} ms")
+
+        # Cross-check every engine against the first one run
+        expected = next(iter(answers.values()))
+        for engine, answer in answers.items():
+            if answer != expected:
+                sys.exit(f"{engine} disagrees on {name}")
+        print(f"    entailed: {sum(expected)} of {len(queries)} queries")
+
+
+def engines(symbols):
+    """
+    Returns a list of `(name, check)` pairs for each entailment engine
+    suitable for a knowledge base over `symbols`, where `check(knowledge,
+    queries)` returns a list of whether knowledge entails each query.
+    """
+    engines = []
+    if len(symbols) <= ENUMERATION_LIMIT:
+        engines.append(("model_check", each_query(model_check)))
+        engines.append(("parallel_model_check", each_query(parallel_model_check)))
+    if len(symbols) <= TRUTH_TABLE_LIMIT:
+        engines.append(("truth_table_check", each_query(truth_table_check)))
+    engines.append(("dpll_check", each_query(dpll_check)))
+    engines.append(("KnowledgeBase", knowledge_base_check))
+    return engines
+
+
+def each_query(entails):
+    """
+    Wraps an entailment function so that it answers a list of queries,
+    one call per query.
+    """
+    def check(knowledge, queries):
+        return [entails(knowledge, query) for query in queries]
+    return check
+
+
+def knowledge_base_check(knowledge, queries):
+    """
+    Answers a list of queries against a single `KnowledgeBase`.
+    """
+    kb = KnowledgeBase(knowledge)
+    return [kb.entails(query) for query in queries]
+
+
+def random_ksat(n, ratio=4.26, k=3, seed=None):
+    """
+    Returns a random k-SAT knowledge base over `n` symbols with
+    `ratio * n` clauses, and a list of its symbols.
+    The default ratio is near the 3-SAT phase transition, where
+    instances are hardest.
+    """
+    rng = random.Random(seed)
+    symbols = [Symbol(f"x{i}") for i in range(n)]
+    clauses = []
+    for _ in range(round(ratio * n)):
+        literals = []
+        for symbol in rng.sample(symbols, k):
+            literals.append(symbol if rng.random() < 0.5 else Not(symbol))
+        clauses.append(Or(*literals))
+    return And(*clauses), symbols
+
+
+def satisfied_clause():
+    """
+    Returns a knowledge base with a clause that is already true when
+    it is added, and a list of its symbols.
+    The clause's other symbol appears nowhere else, but must still be
+    part of every model.
+    """
+    a = Symbol("A")
+    b = Symbol("B")
+    return And(a, Or(a, b)), [a, b]
+
+
+def knights_puzzle(n, seed=None):
+    """
+    Returns a knights-and-knaves puzzle with `n` speakers, and a list
+    of its symbols.
+
+    Speakers are secretly assigned knight or knave, and each makes a
+    random statement about two others that is true exactly when the
+    speaker is a knight, so the secret assignment is always a solution.
+    """
+    rng = random.Random(seed)
+    knights = [Symbol(f"{i} is a Knight") for i in range(n)]
+    knaves = [Symbol(f"{i} is a Knave") for i in range(n)]
+    model = dict()
+    for i in range(n):
+        is_knight = rng.random() < 0.5
+        model[knights[i].name] = is_knight
+        model[knaves[i].name] = not is_knight
+
+    knowledge = []
+    for i in range(n):
+
+        # Info from structure of problem
+        knowledge.append(Or(knights[i], knaves[i]))
+        knowledge.append(Not(And(knights[i], knaves[i])))
+
+        # Speaker i makes a statement about two other people j and k,
+        # which must be true exactly when speaker i is a knight
+        while True:
+            j, k = rng.sample([other for other in range(n) if other != i], 2)
+            statement = rng.choice([
+                knights[j],
+                knaves[j],
+                Or(And(knights[j], knights[k]), And(knaves[j], knaves[k])),
+                Or(And(knights[j], knaves[k]), And(knaves[j], knights[k])),
+                Or(knaves[j], knaves[k]),
+                Implication(knights[j], knaves[k]),
+            ])
+            if statement.evaluate(model) == model[knights[i].name]:
+                break
+
+        knowledge.append(Implication(knights[i], statement))
+        knowledge.append(Implication(knaves[i], Not(statement)))
+
+    return And(*knowledge), knights + knaves
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,118 @@
+import functools
+import heapq
 import itertools
+import math
+import multiprocessing
+import time
+import weakref
 
 
 class Sentence():
+    """
+    Immutable logical sentence.
+
+    Sentences are hash-consed: constructing a sentence identical to one
+    that already exists returns the existing node, so equal sentences are
+    the same object and compare and hash in constant time.
+    """
+
+    __slots__ = ("_operands", "_hash", "_symbols", "__weakref__")
+
+    # Every sentence currently in use, keyed by its class and operands
+    _interned = weakref.WeakValueDictionary()
+
+    def __new__(cls, *operands):
+        for operand in operands:
+            Sentence.validate(operand)
+        return cls._intern(operands)
+
+    @classmethod
+    def _intern(cls, operands, **fields):
+        """Returns the sentence of class `cls` with `operands`, creating it if new."""
+        key = (cls, operands)
+        sentence = Sentence._interned.get(key)
+        if sentence is None:
+            sentence = object.__new__(cls)
+            object.__setattr__(sentence, "_operands", operands)
+            object.__setattr__(sentence, "_hash", hash((cls.__name__, operands)))
+            object.__setattr__(sentence, "_symbols", None)
+            for field, value in fields.items():
+                object.__setattr__(sentence, field, value)
+            Sentence._interned[key] = sentence
+        return sentence
+
+    def __setattr__(self, name, value):
+        raise AttributeError("logical sentences are immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("logical sentences are immutable")
+
+    def __eq__(self, other):
+        return self is other
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        return (type(self), self._operands)
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
         raise Exception("nothing to evaluate")
 
+    def evaluate_bits(self, columns, mask, memo=None):
+        """
+        Evaluates the logical sentence in many models at once.
+        `columns` maps each symbol to an integer whose bits give the
+        symbol's value in each model; `mask` has a bit set per model.
+        `memo` maps sentences already evaluated to their bits, so that
+        subsentences shared between parents are evaluated only once.
+        """
+        if memo is None:
+            memo = dict()
+        if self not in memo:
+            memo[self] = self._evaluate_bits(columns, mask, memo)
+        return memo[self]
+
+    def _evaluate_bits(self, columns, mask, memo):
+        """Evaluates the sentence bitwise, which `evaluate_bits` memoises."""
+        raise Exception("nothing to evaluate")
+
     def formula(self):
         """Returns string formula representing logical sentence."""
         return ""
 
+    def source(self, index):
+        """
+        Returns a Python expression evaluating the logical sentence in a
+        model `m`, a sequence of booleans where `index` maps each symbol
+        to its position.
+        """
+        raise Exception("nothing to evaluate")
+
+    def compile(self, symbols):
+        """
+        Returns a function that evaluates the logical sentence in a model
+        given as a sequence of booleans, one for each of `symbols` in order.
+        Sentences nested too deeply for Python to compile are evaluated
+        by walking the sentence instead.
+        """
+        index = {symbol: i for i, symbol in enumerate(symbols)}
+        try:
+            return eval(f"lambda m: {self.source(index)}")
+        except (SyntaxError, RecursionError, MemoryError):
+            symbols = list(symbols)
+            return lambda m: self.evaluate(dict(zip(symbols, m)))
+
     def symbols(self):
-        """Returns a set of all symbols in the logical sentence."""
-        return set()
+        """Returns a frozenset of all symbols in the logical sentence."""
+        if self._symbols is None:
+            object.__setattr__(self, "_symbols", self._find_symbols())
+        return self._symbols
+
+    def _find_symbols(self):
+        """Computes the symbols of the sentence, which `symbols` caches."""
+        return frozenset()
 
     @classmethod
     def validate(cls, sentence):
@@ -44,14 +143,10 @@ class Sentence():
 
 class Symbol(Sentence):
 
-    def __init__(self, name):
-        self.name = name
+    __slots__ = ("name",)
 
-    def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
-
-    def __hash__(self):
-        return hash(("symbol", self.name))
+    def __new__(cls, name):
+        return cls._intern((name,), name=name)
 
     def __repr__(self):
         return self.name
@@ -62,23 +157,32 @@ class Symbol(Sentence):
         except KeyError:
             raise Exception(f"variable {self.name} not in model")
 
+    def _evaluate_bits(self, columns, mask, memo):
+        try:
+            return columns[self.name]
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
+
     def formula(self):
         return self.name
 
-    def symbols(self):
-        return {self.name}
+    def source(self, index):
+        try:
+            return f"m[{index[self.name]}]"
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
+
+    def _find_symbols(self):
+        return frozenset([self.name])
 
 
 class Not(Sentence):
-    def __init__(self, operand):
-        Sentence.validate(operand)
-        self.operand = operand
 
-    def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+    __slots__ = ("operand",)
 
-    def __hash__(self):
-        return hash(("not", hash(self.operand)))
+    def __new__(cls, operand):
+        Sentence.validate(operand)
+        return cls._intern((operand,), operand=operand)
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -86,26 +190,27 @@ class Not(Sentence):
     def evaluate(self, model):
         return not self.operand.evaluate(model)
 
+    def _evaluate_bits(self, columns, mask, memo):
+        return mask & ~self.operand.evaluate_bits(columns, mask, memo)
+
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
-    def symbols(self):
+    def source(self, index):
+        return f"(not {self.operand.source(index)})"
+
+    def _find_symbols(self):
         return self.operand.symbols()
 
 
 class And(Sentence):
-    def __init__(self, *conjuncts):
-        for conjunct in conjuncts:
-            Sentence.validate(conjunct)
-        self.conjuncts = list(conjuncts)
 
-    def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
+    __slots__ = ("conjuncts",)
 
-    def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
+    def __new__(cls, *conjuncts):
+        for conjunct in conjuncts:
+            Sentence.validate(conjunct)
+        return cls._intern(conjuncts, conjuncts=conjuncts)
 
     def __repr__(self):
         conjunctions = ", ".join(
@@ -114,35 +219,46 @@ class And(Sentence):
         return f"And({conjunctions})"
 
     def add(self, conjunct):
+        """Returns the conjunction of this sentence's conjuncts and `conjunct`."""
         Sentence.validate(conjunct)
-        self.conjuncts.append(conjunct)
+        return And(*self.conjuncts, conjunct)
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
+    def _evaluate_bits(self, columns, mask, memo):
+        bits = mask
+        for conjunct in self.conjuncts:
+            bits &= conjunct.evaluate_bits(columns, mask, memo)
+        return bits
+
     def formula(self):
         if len(self.conjuncts) == 1:
             return self.conjuncts[0].formula()
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
-    def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+    def source(self, index):
+        if not self.conjuncts:
+            return "True"
+        return "(" + " and ".join(
+            [conjunct.source(index) for conjunct in self.conjuncts]
+        ) + ")"
+
+    def _find_symbols(self):
+        return frozenset().union(
+            *[conjunct.symbols() for conjunct in self.conjuncts]
+        )
 
 
 class Or(Sentence):
-    def __init__(self, *disjuncts):
-        for disjunct in disjuncts:
-            Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
 
-    def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
+    __slots__ = ("disjuncts",)
 
-    def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
-        )
+    def __new__(cls, *disjuncts):
+        for disjunct in disjuncts:
+            Sentence.validate(disjunct)
+        return cls._intern(disjuncts, disjuncts=disjuncts)
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
@@ -151,30 +267,40 @@ class Or(Sentence):
     def evaluate(self, model):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
+    def _evaluate_bits(self, columns, mask, memo):
+        bits = 0
+        for disjunct in self.disjuncts:
+            bits |= disjunct.evaluate_bits(columns, mask, memo)
+        return bits
+
     def formula(self):
         if len(self.disjuncts) == 1:
             return self.disjuncts[0].formula()
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+    def source(self, index):
+        if not self.disjuncts:
+            return "False"
+        return "(" + " or ".join(
+            [disjunct.source(index) for disjunct in self.disjuncts]
+        ) + ")"
+
+    def _find_symbols(self):
+        return frozenset().union(
+            *[disjunct.symbols() for disjunct in self.disjuncts]
+        )
 
 
 class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
-        Sentence.validate(antecedent)
-        Sentence.validate(consequent)
-        self.antecedent = antecedent
-        self.consequent = consequent
 
-    def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
+    __slots__ = ("antecedent", "consequent")
 
-    def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+    def __new__(cls, antecedent, consequent):
+        Sentence.validate(antecedent)
+        Sentence.validate(consequent)
+        return cls._intern((antecedent, consequent),
+                           antecedent=antecedent, consequent=consequent)
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -183,29 +309,32 @@ class Implication(Sentence):
         return ((not self.antecedent.evaluate(model))
                 or self.consequent.evaluate(model))
 
+    def _evaluate_bits(self, columns, mask, memo):
+        return mask & (~self.antecedent.evaluate_bits(columns, mask, memo)
+                       | self.consequent.evaluate_bits(columns, mask, memo))
+
     def formula(self):
         antecedent = Sentence.parenthesize(self.antecedent.formula())
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+    def source(self, index):
+        antecedent = self.antecedent.source(index)
+        consequent = self.consequent.source(index)
+        return f"(not {antecedent} or {consequent})"
+
+    def _find_symbols(self):
+        return self.antecedent.symbols() | self.consequent.symbols()
 
 
 class Biconditional(Sentence):
-    def __init__(self, left, right):
-        Sentence.validate(left)
-        Sentence.validate(right)
-        self.left = left
-        self.right = right
 
-    def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
+    __slots__ = ("left", "right")
 
-    def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+    def __new__(cls, left, right):
+        Sentence.validate(left)
+        Sentence.validate(right)
+        return cls._intern((left, right), left=left, right=right)
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
@@ -216,48 +345,577 @@ class Biconditional(Sentence):
                 or (not self.left.evaluate(model)
                     and not self.right.evaluate(model)))
 
+    def _evaluate_bits(self, columns, mask, memo):
+        return mask & ~(self.left.evaluate_bits(columns, mask, memo)
+                        ^ self.right.evaluate_bits(columns, mask, memo))
+
     def formula(self):
         left = Sentence.parenthesize(str(self.left))
         right = Sentence.parenthesize(str(self.right))
         return f"{left} <=> {right}"
 
-    def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
+    def source(self, index):
+        return f"({self.left.source(index)} == {self.right.source(index)})"
+
+    def _find_symbols(self):
+        return self.left.symbols() | self.right.symbols()
 
 
 def model_check(knowledge, query):
     """Checks if knowledge base entails query."""
 
-    def check_all(knowledge, query, symbols, model):
-        """Checks if knowledge base entails query, given a particular model."""
-
-        # If model has an assignment for each symbol
-        if not symbols:
-
-            # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
-            return True
-        else:
-
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
-
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
-
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
-
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
-
     # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
+    symbols = sorted(knowledge.symbols() | query.symbols())
+
+    # Compile "knowledge implies query" once, to evaluate in every model
+    check = Implication(knowledge, query).compile(symbols)
+
+    # Check that knowledge entails query in every model
+    models = itertools.product((True, False), repeat=len(symbols))
+    return all(map(check, models))
+
+
+def parallel_model_check(knowledge, query, split=None, processes=None,
+                         stats=None):
+    """
+    Checks if knowledge base entails query, enumerating models on a
+    process pool.
+
+    The first `split` symbols are fixed to each of their 2^split
+    assignments, and each resulting subspace is checked by a worker.
+    Workers stop as soon as any of them finds a counter-model.
+    If `stats` is a dict, it is filled with the number of models checked,
+    the seconds taken, and the models checked per second.
+    """
+    start = time.perf_counter()
+    symbols = sorted(knowledge.symbols() | query.symbols())
+    sentence = Implication(knowledge, query)
+    try:
+        program = sentence.source({symbol: i for i, symbol in enumerate(symbols)})
+        compile(f"lambda m: {program}", "<sentence>", "eval")
+    except (SyntaxError, RecursionError, MemoryError):
+        # Too deeply nested to compile, so workers compile the sentence itself
+        program = (sentence, tuple(symbols))
+    processes = processes or multiprocessing.cpu_count()
+
+    # By default, give each process a few subspaces to balance load
+    if split is None:
+        split = math.ceil(math.log2(4 * processes))
+    split = min(split, len(symbols))
+    prefixes = itertools.product((True, False), repeat=split)
+
+    entailed = True
+    checked = 0
+    found = multiprocessing.Event()
+    with multiprocessing.Pool(processes, _init_worker, (found,)) as pool:
+        tasks = [(program, len(symbols), prefix) for prefix in prefixes]
+        for models, holds in pool.imap_unordered(_check_subspace, tasks):
+            checked += models
+            if not holds:
+                entailed = False
+                found.set()
+
+    if stats is not None:
+        seconds = time.perf_counter() - start
+        stats["models"] = checked
+        stats["seconds"] = seconds
+        stats["models_per_second"] = checked / seconds if seconds else 0
+    return entailed
+
+
+# Set in each worker once any worker has found a counter-model
+_counter_model_found = None
+
+# Number of models a worker checks between looking for a counter-model elsewhere
+_CHUNK = 4096
+
+
+def _init_worker(found):
+    global _counter_model_found
+    _counter_model_found = found
+
+
+@functools.lru_cache(maxsize=32)
+def _compile_source(source):
+    return eval(f"lambda m: {source}")
+
+
+def _check_subspace(task):
+    """
+    Checks the models of one subspace, whose first symbols are fixed to
+    `prefix`. Returns the number of models checked and whether entailment
+    held in all of them (True if stopped early by another worker).
+    """
+    program, count, prefix = task
+    if isinstance(program, str):
+        check = _compile_source(program)
+    else:
+        sentence, symbols = program
+        check = sentence.compile(symbols)
+    choices = [(value,) for value in prefix]
+    choices += [(True, False)] * (count - len(prefix))
+    models = itertools.product(*choices)
+
+    checked = 0
+    while not _counter_model_found.is_set():
+        chunk = list(itertools.islice(models, _CHUNK))
+        if not chunk:
+            break
+        checked += len(chunk)
+        if not all(map(check, chunk)):
+            return checked, False
+    return checked, True
+
+
+def truth_table(symbols):
+    """
+    Returns a dict mapping each of `symbols` to a column of bits, one for
+    each of the 2^n models over the symbols, together with a mask that
+    has a bit set for every model.
+    """
+    models = 1 << len(symbols)
+    columns = dict()
+    for i, symbol in enumerate(symbols):
+
+        # Symbol i is true in every model whose number has bit i set
+        block = 1 << i
+        column = ((1 << block) - 1) << block
+        length = 2 * block
+        while length < models:
+            column |= column << length
+            length *= 2
+        columns[symbol] = column
+
+    return columns, (1 << models) - 1
+
+
+def truth_table_check(knowledge, query):
+    """
+    Checks if knowledge base entails query, by evaluating both sentences
+    bitwise over every model at once.
+    """
+    symbols = sorted(knowledge.symbols() | query.symbols())
+    columns, mask = truth_table(symbols)
+
+    # Knowledge entails query if no model of the knowledge falsifies query
+    memo = dict()
+    knowledge_bits = knowledge.evaluate_bits(columns, mask, memo)
+    query_bits = query.evaluate_bits(columns, mask, memo)
+    return knowledge_bits & ~query_bits == 0
+
+
+class CNF():
+    """
+    Conjunctive normal form of a set of logical sentences.
+
+    Symbols are numbered from 1 and clauses are lists of integer literals,
+    where `v` means symbol number `v` is true and `-v` means it is false.
+    Compound subformulas are given fresh variables (Tseitin encoding), so
+    the number of clauses grows linearly with the size of the sentences.
+    """
+
+    def __init__(self):
+        self.variables = dict()
+        self.names = [None]
+        self.clauses = []
+        self.literals = dict()
+
+    def variable(self, name):
+        """Returns the variable number of symbol `name`, adding it if new."""
+        if name not in self.variables:
+            self.variables[name] = len(self.names)
+            self.names.append(name)
+        return self.variables[name]
+
+    def fresh(self):
+        """Returns a new variable number not tied to any symbol."""
+        self.names.append(None)
+        return len(self.names) - 1
+
+    def add(self, sentence):
+        """Adds clauses asserting that `sentence` is true."""
+        Sentence.validate(sentence)
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        elif isinstance(sentence, Or):
+            self.clauses.append(
+                [self.literal(disjunct) for disjunct in sentence.disjuncts]
+            )
+        else:
+            self.clauses.append([self.literal(sentence)])
+
+    def literal(self, sentence):
+        """Returns a literal that is true exactly when `sentence` is true."""
+        if isinstance(sentence, Symbol):
+            return self.variable(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+        if sentence in self.literals:
+            return self.literals[sentence]
+
+        if isinstance(sentence, And):
+            operands = [self.literal(c) for c in sentence.conjuncts]
+            v = self.fresh()
+            for operand in operands:
+                self.clauses.append([-v, operand])
+            self.clauses.append([v] + [-operand for operand in operands])
+
+        elif isinstance(sentence, Or):
+            operands = [self.literal(d) for d in sentence.disjuncts]
+            v = self.fresh()
+            for operand in operands:
+                self.clauses.append([v, -operand])
+            self.clauses.append([-v] + operands)
+
+        elif isinstance(sentence, Implication):
+            antecedent = self.literal(sentence.antecedent)
+            consequent = self.literal(sentence.consequent)
+            v = self.fresh()
+            self.clauses.append([-v, -antecedent, consequent])
+            self.clauses.append([v, antecedent])
+            self.clauses.append([v, -consequent])
+
+        elif isinstance(sentence, Biconditional):
+            left = self.literal(sentence.left)
+            right = self.literal(sentence.right)
+            v = self.fresh()
+            self.clauses.append([-v, -left, right])
+            self.clauses.append([-v, left, -right])
+            self.clauses.append([v, left, right])
+            self.clauses.append([v, -left, -right])
 
-    # Check that knowledge entails query
-    return check_all(knowledge, query, symbols, dict())
+        else:
+            raise Exception(f"cannot convert {sentence} to CNF")
+
+        self.literals[sentence] = v
+        return v
+
+
+class Solver():
+    """
+    Conflict-driven clause learning SAT solver over integer-literal clauses.
+
+    Uses two watched literals for unit propagation, first-UIP clause
+    learning with non-chronological backjumping, activity-based decisions
+    with phase saving, and geometric restarts.
+    """
+
+    def __init__(self, clauses=()):
+        self.ok = True
+        self.clauses = []
+        self.watches = dict()
+        self.assigns = dict()
+        self.level = [0]
+        self.reason = [None]
+        self.activity = [0.0]
+        self.phase = [False]
+        self.heap = []
+        self.increment = 1.0
+        self.trail = []
+        self.trail_lim = []
+        self.qhead = 0
+        for clause in clauses:
+            self.add_clause(clause)
+
+    def add_clause(self, clause):
+        """Adds a clause (an iterable of integer literals) to the solver."""
+        self._backtrack(0)
+        clause = list(dict.fromkeys(clause))
+
+        # Every variable must be known, even if the clause is already true
+        for literal in clause:
+            self._grow(abs(literal))
+
+        literals = []
+        for literal in clause:
+            if -literal in literals:
+                return
+            value = self._value(literal)
+            if value is True:
+                return
+            if value is None:
+                literals.append(literal)
+
+        if not literals:
+            self.ok = False
+        elif len(literals) == 1:
+            self._enqueue(literals[0], None)
+        else:
+            self._attach(literals)
+
+    def solve(self, assumptions=()):
+        """
+        Returns a satisfying model as a dict mapping each variable to a
+        boolean, or None if the clauses are unsatisfiable when every
+        literal in `assumptions` is also made true.
+        """
+        if not self.ok:
+            return None
+        for literal in assumptions:
+            self._grow(abs(literal))
+        self._backtrack(0)
+        if self._propagate() is not None:
+            self.ok = False
+            return None
+
+        conflicts = 0
+        limit = 100
+        while True:
+            conflict = self._propagate()
+            if conflict is not None:
+                if not self.trail_lim:
+                    self.ok = False
+                    return None
+                learnt, level = self._analyze(conflict)
+                self._backtrack(level)
+                if len(learnt) == 1:
+                    self._enqueue(learnt[0], None)
+                else:
+                    self._enqueue(learnt[0], self._attach(learnt))
+                self.increment *= 1 / 0.95
+                conflicts += 1
+                continue
+
+            # Restart periodically, keeping learnt clauses
+            if conflicts >= limit:
+                self._backtrack(0)
+                conflicts = 0
+                limit = int(limit * 1.5)
+
+            # Assume each assumption in turn before making free decisions
+            literal = None
+            while len(self.trail_lim) < len(assumptions):
+                assumption = assumptions[len(self.trail_lim)]
+                value = self._value(assumption)
+                if value is True:
+                    self.trail_lim.append(len(self.trail))
+                elif value is False:
+                    self._backtrack(0)
+                    return None
+                else:
+                    literal = assumption
+                    break
+
+            if literal is None:
+                var = self._pick()
+                if var is None:
+                    model = {
+                        var: self.assigns[var]
+                        for var in range(1, len(self.level))
+                    }
+                    self._backtrack(0)
+                    return model
+                literal = var if self.phase[var] else -var
+
+            self.trail_lim.append(len(self.trail))
+            self._enqueue(literal, None)
+
+    def _grow(self, var):
+        while len(self.level) <= var:
+            self.level.append(0)
+            self.reason.append(None)
+            self.activity.append(0.0)
+            self.phase.append(False)
+            heapq.heappush(self.heap, (0.0, len(self.level) - 1))
+
+    def _value(self, literal):
+        return self.assigns.get(literal)
+
+    def _attach(self, clause):
+        index = len(self.clauses)
+        self.clauses.append(clause)
+        self.watches.setdefault(clause[0], []).append(index)
+        self.watches.setdefault(clause[1], []).append(index)
+        return index
+
+    def _enqueue(self, literal, reason):
+        var = abs(literal)
+        if literal in self.assigns:
+            if not self.assigns[literal]:
+                self.ok = False
+            return
+        self.assigns[literal] = True
+        self.assigns[-literal] = False
+        self.level[var] = len(self.trail_lim)
+        self.reason[var] = reason
+        self.trail.append(literal)
+
+    def _propagate(self):
+        """Propagates all enqueued literals, returning a conflicting clause index or None."""
+        assigns = self.assigns
+        clauses = self.clauses
+        watches = self.watches
+        while self.qhead < len(self.trail):
+            false_literal = -self.trail[self.qhead]
+            self.qhead += 1
+            watchers = watches.get(false_literal, [])
+            watches[false_literal] = kept = []
+            for position, index in enumerate(watchers):
+                clause = clauses[index]
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], clause[0]
+
+                # Clause already satisfied by its other watch
+                first = assigns.get(clause[0])
+                if first is True:
+                    kept.append(index)
+                    continue
+
+                # Look for a new literal to watch
+                for k in range(2, len(clause)):
+                    if assigns.get(clause[k]) is not False:
+                        clause[1], clause[k] = clause[k], clause[1]
+                        watches.setdefault(clause[1], []).append(index)
+                        break
+                else:
+                    kept.append(index)
+                    if first is False:
+                        kept.extend(watchers[position + 1:])
+                        self.qhead = len(self.trail)
+                        return index
+                    self._enqueue(clause[0], index)
+        return None
+
+    def _analyze(self, conflict):
+        """Derives a first-UIP learnt clause and the level to backjump to."""
+        learnt = [None]
+        seen = set()
+        counter = 0
+        literal = None
+        index = len(self.trail) - 1
+        clause = self.clauses[conflict]
+        current = len(self.trail_lim)
+
+        while True:
+            for other in (clause if literal is None else clause[1:]):
+                var = abs(other)
+                if var not in seen and self.level[var] > 0:
+                    seen.add(var)
+                    self._bump(var)
+                    if self.level[var] == current:
+                        counter += 1
+                    else:
+                        learnt.append(other)
+
+            # Walk back along the trail to the next literal involved
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            counter -= 1
+            if counter == 0:
+                break
+            clause = self.clauses[self.reason[abs(literal)]]
+
+        learnt[0] = -literal
+
+        if len(learnt) == 1:
+            return learnt, 0
+
+        # Watch the literal from the highest remaining level second
+        highest = max(range(1, len(learnt)),
+                      key=lambda i: self.level[abs(learnt[i])])
+        learnt[1], learnt[highest] = learnt[highest], learnt[1]
+        return learnt, self.level[abs(learnt[1])]
+
+    def _backtrack(self, level):
+        if len(self.trail_lim) <= level:
+            return
+        for literal in self.trail[self.trail_lim[level]:]:
+            var = abs(literal)
+            self.phase[var] = literal > 0
+            del self.assigns[literal], self.assigns[-literal]
+            self.reason[var] = None
+            heapq.heappush(self.heap, (-self.activity[var], var))
+        del self.trail[self.trail_lim[level]:]
+        del self.trail_lim[level:]
+        self.qhead = len(self.trail)
+
+    def _bump(self, var):
+        self.activity[var] += self.increment
+        if self.activity[var] > 1e100:
+            self.activity = [a * 1e-100 for a in self.activity]
+            self.increment *= 1e-100
+            self.heap = [(-self.activity[v], v)
+                         for v in range(1, len(self.level))
+                         if v not in self.assigns]
+            heapq.heapify(self.heap)
+        elif var not in self.assigns:
+            heapq.heappush(self.heap, (-self.activity[var], var))
+
+    def _pick(self):
+        while self.heap:
+            activity, var = heapq.heappop(self.heap)
+            if var not in self.assigns and -activity == self.activity[var]:
+                return var
+        for var in range(1, len(self.level)):
+            if var not in self.assigns:
+                return var
+        return None
+
+
+def dpll_check(knowledge, query):
+    """
+    Checks if knowledge base entails query, by checking that
+    knowledge ∧ ¬query is unsatisfiable.
+    """
+    cnf = CNF()
+    cnf.add(knowledge)
+    cnf.add(Not(query))
+    return Solver(cnf.clauses).solve() is None
+
+
+class KnowledgeBase():
+    """
+    Knowledge base compiled once to CNF, answering entailment queries
+    with a single incremental solver.
+
+    Each query is solved by assuming it false, so clauses learnt while
+    answering one query are kept for the next. Models of the knowledge
+    found along the way are cached, and any query false in a cached model
+    is answered without solving.
+    """
+
+    def __init__(self, *sentences):
+        self.cnf = CNF()
+        self.solver = Solver()
+        self.synced = 0
+        self.models = []
+        for sentence in sentences:
+            self.add(sentence)
+
+    def add(self, sentence):
+        """Adds `sentence` to the knowledge base."""
+        self.cnf.add(sentence)
+        self._sync()
+
+        # Cached models need not satisfy the new sentence
+        self.models = []
+
+    def entails(self, query):
+        """Checks if knowledge base entails query."""
+        Sentence.validate(query)
+
+        # Query is not entailed if some known model of the knowledge falsifies it
+        symbols = query.symbols()
+        for model in self.models:
+            if symbols <= model.keys() and not query.evaluate(model):
+                return False
+
+        # Otherwise check that knowledge is unsatisfiable with query false
+        literal = self.cnf.literal(query)
+        self._sync()
+        model = self.solver.solve([-literal])
+        if model is None:
+            return True
+        self.models.append({
+            name: model[var] for name, var in self.cnf.variables.items()
+        })
+        return False
+
+    def _sync(self):
+        """Passes clauses added to the CNF since the last sync to the solver."""
+        for clause in self.cnf.clauses[self.synced:]:
+            self.solver.add_clause(clause)
+        self.synced = len(self.cnf.clauses)
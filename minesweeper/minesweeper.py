@@ -1,5 +1,13 @@
+import functools
 import itertools
+import logging
+import math
+import numpy as np
 import random
+import time
+
+# Logs a summary of every move at INFO level, and the knowledge base at DEBUG level
+logger = logging.getLogger(__name__)
 
 
 class Minesweeper():
@@ -101,6 +109,13 @@ class Sentence():
     def __str__(self):
         return f"{self.cells} = {self.count}"
 
+    def key(self):
+        """
+        Returns a hashable snapshot of the sentence,
+        equal for sentences that are equal.
+        """
+        return frozenset(self.cells), self.count
+
     def known_mines(self):
         """
         Returns the set of all cells in self.cells known to be mines.
@@ -142,12 +157,29 @@ class MinesweeperAI():
     Minesweeper game player
     """
 
-    def __init__(self, height=8, width=8):
+    def __init__(self, height=8, width=8, mines=None, time_budget=0.1,
+                 trace=None):
 
         # Set initial height and width
         self.height = height
         self.width = width
 
+        # Number of mines on the board, assumed to be one cell in eight if unknown
+        self.total_mines = mines if mines is not None else height * width // 8
+
+        # Seconds to spend working out mine probabilities before guessing
+        self.time_budget = time_budget
+
+        # Called as trace(cell, count, stats) after every move, if set
+        self.trace = trace
+
+        # Statistics about the last move, and whether to time its phases
+        self.stats = self.new_stats()
+        self.timed = False
+
+        # Mine counts of components of the board already worked out
+        self.component_cache = dict()
+
         # Keep track of which cells have been clicked on
         self.moves_made = set()
 
@@ -155,8 +187,14 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Sentences about the game known to be true, keyed by their cells and count
+        self.knowledge = dict()
+
+        # Keys of the sentences that mention each cell
+        self.index = dict()
+
+        # Keys of sentences that are new or changed since they were last checked
+        self.pending = []
 
     def mark_mine(self, cell):
         """
@@ -164,8 +202,11 @@ class MinesweeperAI():
         to mark that cell as a mine as well.
         """
         self.mines.add(cell)
-        for sentence in self.knowledge:
+        self.stats["mines_marked"] += 1
+        for key in self.index.pop(cell, ()):
+            sentence = self.remove_sentence(key)
             sentence.mark_mine(cell)
+            self.insert_sentence(sentence)
 
     def mark_safe(self, cell):
         """
@@ -173,8 +214,11 @@ class MinesweeperAI():
         to mark that cell as safe as well.
         """
         self.safes.add(cell)
-        for sentence in self.knowledge:
+        self.stats["safes_marked"] += 1
+        for key in self.index.pop(cell, ()):
+            sentence = self.remove_sentence(key)
             sentence.mark_safe(cell)
+            self.insert_sentence(sentence)
 
     def add_knowledge(self, cell, count):
         """
@@ -191,66 +235,142 @@ class MinesweeperAI():
             5) add any new sentences to the AI's knowledge base
                if they can be inferred from existing knowledge
         """
+        # only time each phase if someone is listening
+        self.stats = self.new_stats()
+        self.timed = self.trace is not None or logger.isEnabledFor(logging.INFO)
+
         # mark the cell as a move that has been made
         self.moves_made.add(cell)
 
         # mark the cell as safe
+        start = time.perf_counter() if self.timed else 0
         self.mark_safe(cell)
+        if self.timed:
+            self.stats["marking"] += time.perf_counter() - start
+
+        # add a new sentence about the cell's neighbors to the AI's knowledge base
+        self.add_sentence(self.find_all_neighbors(cell), count)
+
+        # mark any additional cells as safe or as mines, and add any new sentences
+        # that can be inferred (using subset method), until nothing new is learnt
+        self.propagate()
+
+        # report on the move and the current knowledge base
+        self.stats["sentences"] = len(self.knowledge)
+        if self.trace is not None:
+            self.trace(cell, count, self.stats)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "Move %s: %d sentences in knowledge base, %d inferred, "
+                "%d mines and %d safes marked; marking %.6fs, pruning %.6fs, "
+                "subset inference %.6fs",
+                cell, self.stats["sentences"], self.stats["inferred"],
+                self.stats["mines_marked"], self.stats["safes_marked"],
+                self.stats["marking"], self.stats["pruning"],
+                self.stats["subset_inference"]
+            )
+        if logger.isEnabledFor(logging.DEBUG):
+            for sentence in self.knowledge.values():
+                logger.debug("%s", sentence)
+
+    def new_stats(self):
+        """
+        Returns statistics for a move with nothing done yet: numbers of
+        sentences inferred and cells marked, and seconds spent marking
+        cells, pruning used-up sentences and inferring from subsets.
+        """
+        return {
+            "sentences": 0,
+            "inferred": 0,
+            "mines_marked": 0,
+            "safes_marked": 0,
+            "marking": 0.0,
+            "pruning": 0.0,
+            "subset_inference": 0.0,
+        }
+
+    def add_sentence(self, cells, count):
+        """
+        Adds a sentence that `count` of `cells` are mines to the knowledge
+        base, leaving out cells already known to be mines or safe.
+        Returns whether a new sentence was added.
+        """
+        cells = set(cells)
+        count -= len(cells & self.mines)
+        cells -= self.mines
+        cells -= self.safes
+        return self.insert_sentence(Sentence(cells, count))
 
-        # find all neighbors of cell
-        neighbors = self.find_all_neighbors(cell)
-
-        # remove cells from neighbors set whose state is already known, and update mine count accordingly
-        mine_count = count
-        neighbors_to_remove = set()
-        for neighbor in neighbors:
-            if neighbor in self.mines:
-                neighbors_to_remove.add(neighbor)
-                mine_count -= 1
-            if neighbor in self.safes:
-                neighbors_to_remove.add(neighbor)
-        neighbors -= neighbors_to_remove
-
-        # add a new sentence to the AI's knowledge base
-        new_sentence = Sentence(neighbors, mine_count)
-        self.knowledge.append(new_sentence)
-
-        # mark any additional cells as safe or as mines if it can be concluded based on the AI's knowledge base
-        mines_to_mark = set()
-        safes_to_mark = set()
-        for sentence in self.knowledge:
-            for mine in sentence.known_mines():
-                mines_to_mark.add(mine)
-            for safe in sentence.known_safes():
-                safes_to_mark.add(safe)
-        for mine in mines_to_mark:
-            self.mark_mine(mine)
-        for safe in safes_to_mark:
-            self.mark_safe(safe)
-
-        # Remove empty knowledge sentences
-        sentences_to_remove = []
-        for sentence in self.knowledge:
-            if sentence.cells == set():
-                sentences_to_remove.append(sentence)
-        for sentence in sentences_to_remove:
-            self.knowledge.remove(sentence)
-
-        # add any new sentences to the AI's knowledge base if they can be inferred from existing knowledge (using subset method)
-        knowledge_to_add = []
-        for sentence in self.knowledge:
-            if new_sentence.cells and sentence.cells != new_sentence.cells:
-                if sentence.cells.issubset(new_sentence.cells):
-                    knowledge_to_add.append(Sentence(new_sentence.cells-sentence.cells, new_sentence.count-sentence.count))
-                if new_sentence.cells.issubset(sentence.cells):
-                    knowledge_to_add.append(Sentence(sentence.cells-new_sentence.cells, sentence.count-new_sentence.count))
-        self.knowledge += knowledge_to_add
-        
-        # print current knowledge base
-        print("Number of sentenes in knowledge base: {}".format(len(self.knowledge)))
-        for sentence in self.knowledge:
-            print("{} = {}".format(sentence.cells, sentence.count))
-
+    def insert_sentence(self, sentence):
+        """
+        Adds `sentence` to the knowledge base and queues it to be checked,
+        unless it is empty or an equal sentence is already known.
+        Returns whether the sentence was added.
+        """
+        key = sentence.key()
+        if not sentence.cells or key in self.knowledge:
+            return False
+        self.knowledge[key] = sentence
+        for cell in sentence.cells:
+            self.index.setdefault(cell, set()).add(key)
+        self.pending.append(key)
+        return True
+
+    def remove_sentence(self, key):
+        """
+        Removes a sentence from the knowledge base and returns it.
+        """
+        sentence = self.knowledge.pop(key)
+        for cell in sentence.cells:
+            keys = self.index.get(cell)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.index[cell]
+        return sentence
+
+    def propagate(self):
+        """
+        Checks every new or changed sentence until nothing more can be
+        inferred. Cells a sentence shows to be mines or safe are marked,
+        which only revisits the sentences that mention them. Otherwise the
+        sentence is compared with every sentence it shares a cell with,
+        adding their difference whenever one is a subset of the other.
+        """
+        while self.pending:
+            key = self.pending.pop()
+            sentence = self.knowledge.get(key)
+            if sentence is None:
+                continue
+
+            # Sentence is used up once its cells are known
+            start = time.perf_counter() if self.timed else 0
+            mines = sentence.known_mines().copy()
+            safes = sentence.known_safes().copy()
+            if mines or safes:
+                self.remove_sentence(key)
+                if self.timed:
+                    now = time.perf_counter()
+                    self.stats["pruning"] += now - start
+                    start = now
+                for mine in mines:
+                    self.mark_mine(mine)
+                for safe in safes:
+                    self.mark_safe(safe)
+                if self.timed:
+                    self.stats["marking"] += time.perf_counter() - start
+                continue
+
+            # Infer new sentences from subsets
+            related = set().union(*[self.index[cell] for cell in sentence.cells])
+            related.discard(key)
+            for other in [self.knowledge[other_key] for other_key in related]:
+                if other.cells < sentence.cells:
+                    self.stats["inferred"] += self.add_sentence(sentence.cells - other.cells, sentence.count - other.count)
+                elif sentence.cells < other.cells:
+                    self.stats["inferred"] += self.add_sentence(other.cells - sentence.cells, other.count - sentence.count)
+            if self.timed:
+                self.stats["subset_inference"] += time.perf_counter() - start
 
     def make_safe_move(self):
         """
@@ -270,19 +390,126 @@ class MinesweeperAI():
 
     def make_random_move(self):
         """
-        Returns a move to make on the Minesweeper board.
-        Should choose randomly among cells that:
+        Returns a move to make on the Minesweeper board, when no move is
+        known to be safe. Chooses among cells that:
             1) have not already been chosen, and
             2) are not known to be mines
+        the one least likely to be a mine given the AI's knowledge,
+        choosing randomly between equally likely cells.
         """
-        all_moves = set(itertools.product(range(self.height), range(self.width)))
-        possible_moves = list(all_moves - self.mines - self.moves_made)
+        probabilities, unconstrained = self.mine_probabilities()
+
+        # Cells that no sentence mentions are all equally likely to be mines
+        candidates = []
+        if unconstrained is not None:
+            candidates.append((unconstrained, None))
+        candidates += [(p, cell) for cell, p in probabilities.items()]
+        candidates += [(0, cell) for cell in self.safes - self.moves_made]
 
         # no possible moves that are not known to be mines and that haven't already been made
-        if not possible_moves:
+        if not candidates:
             return None
 
-        return random.choice(possible_moves)
+        lowest = min(p for p, cell in candidates)
+        cell = random.choice([cell for p, cell in candidates if p <= lowest + 1e-9])
+        if cell is None:
+            return self.random_unconstrained_cell(probabilities)
+        return cell
+
+    def mine_probabilities(self):
+        """
+        Returns a dict mapping each cell mentioned in the knowledge base to
+        the probability that it is a mine, and the probability that any
+        other cell not yet chosen or known to be a mine is a mine (None if
+        there are no such cells).
+
+        Cells are split into components that share no sentences, and the
+        mine layouts of each component consistent with the knowledge are
+        enumerated. Layouts are weighted by the number of ways to place
+        the remaining mines among the unconstrained cells. Components not
+        enumerated within `self.time_budget` fall back to the largest
+        mine density of the sentences mentioning each cell.
+        """
+        deadline = time.perf_counter() + self.time_budget
+        constraints = self.constraints()
+        components = connected_components(constraints)
+        frontier = set().union(*[cells for cells, count in constraints])
+        known = self.mines | self.safes | self.moves_made
+        unconstrained = self.height * self.width - len(known) - len(frontier)
+        remaining = self.total_mines - len(self.mines)
+
+        # Count layouts of each component by number of mines
+        counts = []
+        probabilities = dict()
+        for component in components:
+            key = frozenset((frozenset(cells), count) for cells, count in component)
+            if key not in self.component_cache:
+                result = count_layouts(component, deadline)
+                if result is None:
+                    for cells, count in component:
+                        for cell in cells:
+                            probabilities[cell] = max(probabilities.get(cell, 0), count / len(cells))
+                    continue
+                if len(self.component_cache) > 10000:
+                    self.component_cache.clear()
+                self.component_cache[key] = result
+            counts.append(self.component_cache[key])
+            for cells, count in component:
+                for cell in cells:
+                    probabilities[cell] = 0
+
+        # Weight for each total number of mines in the enumerated components
+        def ways(mines):
+            if 0 <= remaining - mines <= unconstrained:
+                return math.comb(unconstrained, remaining - mines)
+            return 0
+
+        layouts_by_mines = [{k: layouts for k, (layouts, _) in c.items()} for c in counts]
+        combined = convolve(layouts_by_mines)
+        weight = {mines: ways(mines) for mines in combined}
+
+        # Knowledge disagrees with the assumed number of mines, so ignore it
+        if not any(combined[mines] * weight[mines] for mines in combined):
+            weight = {mines: 1 for mines in combined}
+        total = sum(combined[mines] * weight[mines] for mines in combined)
+
+        for i, component_counts in enumerate(counts):
+            others = convolve(layouts_by_mines[:i] + layouts_by_mines[i + 1:])
+            for k, (layouts, cell_counts) in component_counts.items():
+                factor = sum(others[j] * weight.get(k + j, 0) for j in others)
+                for cell, mines in cell_counts.items():
+                    probabilities[cell] = probabilities.get(cell, 0) + mines * factor / total
+
+        # Expected number of mines among the unconstrained cells
+        if unconstrained:
+            expected = sum(combined[mines] * weight[mines] * (remaining - mines)
+                           for mines in combined)
+            unconstrained_probability = max(expected / total, 0) / unconstrained
+        else:
+            unconstrained_probability = None
+        return probabilities, unconstrained_probability
+
+    def constraints(self):
+        """
+        Returns a list of `(cells, count)` pairs, one for each sentence
+        in the knowledge base.
+        """
+        return [(sentence.cells, sentence.count) for sentence in self.knowledge.values()]
+
+    def random_unconstrained_cell(self, frontier):
+        """
+        Returns a random cell that has not been chosen, is not known to be
+        a mine, and is not in `frontier`.
+        """
+        known = self.mines | self.safes | self.moves_made
+        for _ in range(20):
+            cell = (random.randrange(self.height), random.randrange(self.width))
+            if cell not in known and cell not in frontier:
+                return cell
+
+        # Few cells left, so list them all
+        all_moves = set(itertools.product(range(self.height), range(self.width)))
+        return random.choice(list(all_moves - known - set(frontier)))
 
     def find_all_neighbors(self, cell):
         """
@@ -313,4 +540,465 @@ class MinesweeperAI():
             if (j+1 <= self.width-1):
                 neighbors.add((i+1, j+1))
         
-        return neighbors
\ No newline at end of file
+        return neighbors
+
+
+def connected_components(constraints):
+    """
+    Splits a list of `(cells, count)` constraints into lists of
+    constraints such that no two lists have a cell in common.
+    """
+    parent = dict()
+
+    def find(cell):
+        while parent[cell] != cell:
+            parent[cell] = parent[parent[cell]]
+            cell = parent[cell]
+        return cell
+
+    for cells, count in constraints:
+        first = None
+        for cell in cells:
+            parent.setdefault(cell, cell)
+            if first is None:
+                first = find(cell)
+            else:
+                parent[find(cell)] = first
+
+    components = dict()
+    for cells, count in constraints:
+        root = find(next(iter(cells)))
+        components.setdefault(root, []).append((cells, count))
+    return list(components.values())
+
+
+def count_layouts(constraints, deadline):
+    """
+    Enumerates the mine layouts of the cells in `constraints` under which
+    every `(cells, count)` constraint holds.
+
+    Returns a dict mapping each number of mines `k` to a pair of the
+    number of layouts with `k` mines, and a dict mapping each cell to the
+    number of those layouts in which it is a mine. Returns None if
+    `deadline` (a `time.perf_counter` value) passes first.
+    """
+    # Order cells so that each constraint is completed as early as possible
+    order = []
+    seen = set()
+    for cells, count in sorted(constraints, key=lambda c: len(c[0])):
+        for cell in cells:
+            if cell not in seen:
+                seen.add(cell)
+                order.append(cell)
+
+    counts = [count for cells, count in constraints]
+    unassigned = [len(cells) for cells, count in constraints]
+    affects = {cell: [] for cell in order}
+    for c, (cells, count) in enumerate(constraints):
+        for cell in cells:
+            affects[cell].append(c)
+
+    results = dict()
+    layout = []
+    mines = 0
+
+    def undo(cell, is_mine):
+        for c in affects[cell]:
+            counts[c] += is_mine
+            unassigned[c] += 1
+
+    # Depth-first search without recursion, as components can be far
+    # larger than the recursion limit: options[index] is the next value
+    # to try for cell order[index], 0 for safe and 1 for a mine
+    options = [0]
+    while options:
+        if time.perf_counter() > deadline:
+            return None
+        index = len(options) - 1
+
+        # Record a complete layout, then backtrack
+        if index == len(order):
+            layouts, cell_counts = results.get(mines, (0, dict()))
+            for cell, is_mine in zip(order, layout):
+                if is_mine:
+                    cell_counts[cell] = cell_counts.get(cell, 0) + 1
+            results[mines] = (layouts + 1, cell_counts)
+            option = 2
+        else:
+            option = options[index]
+            options[index] += 1
+
+        # Try the next value for this cell, going deeper if it fits
+        if option < 2:
+            cell = order[index]
+            is_mine = bool(option)
+            consistent = True
+            for c in affects[cell]:
+                counts[c] -= is_mine
+                unassigned[c] -= 1
+                if counts[c] < 0 or counts[c] > unassigned[c]:
+                    consistent = False
+            if consistent:
+                layout.append(is_mine)
+                mines += is_mine
+                options.append(0)
+            else:
+                undo(cell, is_mine)
+            continue
+
+        # Both values tried, so undo the previous cell
+        options.pop()
+        if layout:
+            is_mine = layout.pop()
+            mines -= is_mine
+            undo(order[index - 1], is_mine)
+
+    return results
+
+
+def convolve(distributions):
+    """
+    Combines dicts mapping numbers of mines to numbers of layouts into the
+    number of layouts for each total number of mines.
+    """
+    combined = {0: 1}
+    for distribution in distributions:
+        result = dict()
+        for a, x in combined.items():
+            for b, y in distribution.items():
+                result[a + b] = result.get(a + b, 0) + x * y
+        combined = result
+    return combined
+
+
+def neighbor_mask(cell, height, width):
+    """
+    Returns a bitmask of the neighbors of cell (i, j) on a board of the
+    given size, where bit i * width + j stands for cell (i, j).
+    """
+    i, j = cell
+    pattern = neighbor_pattern(width, i > 0, i < height - 1, j > 0, j < width - 1)
+
+    # Move the pattern from around cell (1, 1) to around cell (i, j)
+    shift = (i - 1) * width + (j - 1)
+    return pattern << shift if shift >= 0 else pattern >> -shift
+
+
+@functools.lru_cache(maxsize=64)
+def neighbor_pattern(width, above, below, left, right):
+    """
+    Returns a bitmask of the neighbors of cell (1, 1) on a board of the
+    given width, leaving out the row above, the row below, the column
+    to the left or the column to the right where those are False.
+    """
+    rows = [k for k, keep in [(0, above), (1, True), (2, below)] if keep]
+    columns = [l for l, keep in [(0, left), (1, True), (2, right)] if keep]
+    mask = 0
+    for k in rows:
+        for l in columns:
+            if (k, l) != (1, 1):
+                mask |= 1 << (k * width + l)
+    return mask
+
+
+def bits(mask):
+    """
+    Yields the index of each bit set in `mask`.
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class BitboardMinesweeper(Minesweeper):
+    """
+    Minesweeper game representation with the mines stored as a bitmask,
+    where bit i * width + j stands for cell (i, j)
+    """
+
+    def __init__(self, height=8, width=8, mines=8):
+
+        # Set initial width, height, and number of mines
+        self.height = height
+        self.width = width
+
+        # Add mines randomly
+        self.mine_bits = 0
+        for bit in random.sample(range(height * width), mines):
+            self.mine_bits |= 1 << bit
+        self.mines = {divmod(bit, width) for bit in bits(self.mine_bits)}
+
+        # At first, player has found no mines
+        self.mines_found = set()
+
+    def print(self):
+        """
+        Prints a text-based representation
+        of where mines are located.
+        """
+        for i in range(self.height):
+            print("--" * self.width + "-")
+            for j in range(self.width):
+                if self.is_mine((i, j)):
+                    print("|X", end="")
+                else:
+                    print("| ", end="")
+            print("|")
+        print("--" * self.width + "-")
+
+    def is_mine(self, cell):
+        i, j = cell
+        return bool(self.mine_bits >> (i * self.width + j) & 1)
+
+    def nearby_mines(self, cell):
+        """
+        Returns the number of mines that are
+        within one row and column of a given cell,
+        not including the cell itself.
+        """
+        i, j = cell
+        neighbors = neighbor_mask(cell, self.height, self.width)
+        return (neighbors & self.mine_bits).bit_count()
+
+
+class ArrayMinesweeper(Minesweeper):
+    """
+    Minesweeper game representation with the mines stored as a NumPy
+    array, and the number of mines around every cell worked out up front
+    """
+
+    def __init__(self, height=8, width=8, mines=8):
+
+        # Set initial width, height, and number of mines
+        self.height = height
+        self.width = width
+
+        # Add mines randomly, seeded from the random module so games repeat
+        rng = np.random.default_rng(random.getrandbits(64))
+        self.board = np.zeros((height, width), dtype=bool)
+        self.board.flat[rng.choice(height * width, size=mines, replace=False)] = True
+        self.mines = set(zip(*(axis.tolist() for axis in self.board.nonzero())))
+
+        # Count mines around every cell by summing the 8 shifted copies
+        # of the board, padded with a border of empty cells
+        padded = np.pad(self.board, 1).astype(np.uint8)
+        self.counts = np.zeros((height, width), dtype=np.uint8)
+        for di, dj in itertools.product(range(3), repeat=2):
+            if (di, dj) != (1, 1):
+                self.counts += padded[di:di + height, dj:dj + width]
+
+        # At first, player has found no mines
+        self.mines_found = set()
+
+    def is_mine(self, cell):
+        i, j = cell
+        return bool(self.board[i, j])
+
+    def nearby_mines(self, cell):
+        """
+        Returns the number of mines that are
+        within one row and column of a given cell,
+        not including the cell itself.
+        """
+        i, j = cell
+        return int(self.counts[i, j])
+
+
+class BitboardSentence():
+    """
+    Logical statement about a Minesweeper game, with its cells
+    stored as a bitmask where bit i * width + j stands for cell (i, j)
+    """
+
+    def __init__(self, cells, count, width):
+        self.cells = cells
+        self.count = count
+        self.width = width
+
+    def __eq__(self, other):
+        return self.cells == other.cells and self.count == other.count
+
+    def __str__(self):
+        cells = {divmod(bit, self.width) for bit in bits(self.cells)}
+        return f"{cells} = {self.count}"
+
+    def key(self):
+        """
+        Returns a hashable snapshot of the sentence,
+        equal for sentences that are equal.
+        """
+        return self.cells, self.count
+
+    def known_mines(self):
+        """
+        Returns a bitmask of the cells known to be mines.
+        """
+        if self.count == self.cells.bit_count():
+            return self.cells
+        else:
+            return 0
+
+    def known_safes(self):
+        """
+        Returns a bitmask of the cells known to be safe.
+        """
+        if self.count == 0:
+            return self.cells
+        else:
+            return 0
+
+    def mark_mine(self, mask):
+        """
+        Updates internal knowledge representation given the fact that
+        the cells in bitmask `mask` are known to be mines.
+        """
+        self.count -= (self.cells & mask).bit_count()
+        self.cells &= ~mask
+
+    def mark_safe(self, mask):
+        """
+        Updates internal knowledge representation given the fact that
+        the cells in bitmask `mask` are known to be safe.
+        """
+        self.cells &= ~mask
+
+
+class BitboardMinesweeperAI(MinesweeperAI):
+    """
+    Minesweeper game player keeping its knowledge as bitmasks,
+    where bit i * width + j stands for cell (i, j)
+    """
+
+    def __init__(self, height=8, width=8, mines=None, time_budget=0.1,
+                 trace=None):
+        super().__init__(height, width, mines, time_budget, trace)
+
+        # Cells known to be safe or mines, as bitmasks
+        self.mine_bits = 0
+        self.safe_bits = 0
+
+    def mark_mine(self, cell):
+        """
+        Marks a cell as a mine, and updates all knowledge
+        to mark that cell as a mine as well.
+        """
+        self.mines.add(cell)
+        self.stats["mines_marked"] += 1
+        bit = cell[0] * self.width + cell[1]
+        self.mine_bits |= 1 << bit
+        for key in self.index.pop(bit, ()):
+            sentence = self.remove_sentence(key)
+            sentence.mark_mine(1 << bit)
+            self.insert_sentence(sentence)
+
+    def mark_safe(self, cell):
+        """
+        Marks a cell as safe, and updates all knowledge
+        to mark that cell as safe as well.
+        """
+        self.safes.add(cell)
+        self.stats["safes_marked"] += 1
+        bit = cell[0] * self.width + cell[1]
+        self.safe_bits |= 1 << bit
+        for key in self.index.pop(bit, ()):
+            sentence = self.remove_sentence(key)
+            sentence.mark_safe(1 << bit)
+            self.insert_sentence(sentence)
+
+    def add_sentence(self, cells, count):
+        """
+        Adds a sentence that `count` of the cells in bitmask `cells` are
+        mines to the knowledge base, leaving out cells already known to be
+        mines or safe. Returns whether a new sentence was added.
+        """
+        count -= (cells & self.mine_bits).bit_count()
+        cells &= ~(self.mine_bits | self.safe_bits)
+        return self.insert_sentence(BitboardSentence(cells, count, self.width))
+
+    def insert_sentence(self, sentence):
+        """
+        Adds `sentence` to the knowledge base and queues it to be checked,
+        unless it is empty or an equal sentence is already known.
+        Returns whether the sentence was added.
+        """
+        key = sentence.key()
+        if not sentence.cells or key in self.knowledge:
+            return False
+        self.knowledge[key] = sentence
+        for bit in bits(sentence.cells):
+            self.index.setdefault(bit, set()).add(key)
+        self.pending.append(key)
+        return True
+
+    def remove_sentence(self, key):
+        """
+        Removes a sentence from the knowledge base and returns it.
+        """
+        sentence = self.knowledge.pop(key)
+        for bit in bits(sentence.cells):
+            keys = self.index.get(bit)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.index[bit]
+        return sentence
+
+    def propagate(self):
+        """
+        Checks every new or changed sentence until nothing more can be
+        inferred, as in `MinesweeperAI.propagate`, using bitwise subset
+        and difference tests.
+        """
+        while self.pending:
+            key = self.pending.pop()
+            sentence = self.knowledge.get(key)
+            if sentence is None:
+                continue
+
+            # Sentence is used up once its cells are known
+            start = time.perf_counter() if self.timed else 0
+            mines = sentence.known_mines()
+            safes = sentence.known_safes()
+            if mines or safes:
+                self.remove_sentence(key)
+                if self.timed:
+                    now = time.perf_counter()
+                    self.stats["pruning"] += now - start
+                    start = now
+                for bit in bits(mines):
+                    self.mark_mine(divmod(bit, self.width))
+                for bit in bits(safes):
+                    self.mark_safe(divmod(bit, self.width))
+                if self.timed:
+                    self.stats["marking"] += time.perf_counter() - start
+                continue
+
+            # Infer new sentences from subsets
+            cells = sentence.cells
+            related = set().union(*[self.index[bit] for bit in bits(cells)])
+            related.discard(key)
+            for other in [self.knowledge[other_key] for other_key in related]:
+                common = other.cells & cells
+                if common == other.cells:
+                    self.stats["inferred"] += self.add_sentence(cells & ~common, sentence.count - other.count)
+                elif common == cells:
+                    self.stats["inferred"] += self.add_sentence(other.cells & ~common, other.count - sentence.count)
+            if self.timed:
+                self.stats["subset_inference"] += time.perf_counter() - start
+
+    def constraints(self):
+        """
+        Returns a list of `(cells, count)` pairs, one for each sentence
+        in the knowledge base, with cells as sets of `(i, j)` tuples.
+        """
+        return [
+            ({divmod(bit, self.width) for bit in bits(sentence.cells)}, sentence.count)
+            for sentence in self.knowledge.values()
+        ]
+
+    def find_all_neighbors(self, cell):
+        """
+        Returns a bitmask of all neighbors for the cell (i, j)
+        """
+        return neighbor_mask(cell, self.height, self.width)
@@ -0,0 +1,110 @@
+import argparse
+import multiprocessing
+import random
+import time
+
+from minesweeper import (
+    ArrayMinesweeper, BitboardMinesweeper, BitboardMinesweeperAI,
+    Minesweeper, MinesweeperAI
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play many seeded Minesweeper games with the AI, without a display."
+    )
+    parser.add_argument("-n", "--games", type=int, default=1000)
+    parser.add_argument("--height", type=int, default=8)
+    parser.add_argument("--width", type=int, default=8)
+    parser.add_argument("--mines", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--bitboard", action="store_true",
+                        help="use the bitboard game and AI")
+    parser.add_argument("--array", action="store_true",
+                        help="use the NumPy array game")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = simulate(args.games, args.height, args.width, args.mines,
+                       seed=args.seed, processes=args.processes,
+                       bitboard=args.bitboard, array=args.array)
+    seconds = time.perf_counter() - start
+
+    # Print results
+    wins = sum(won for won, moves, latencies in results)
+    moves = [moves for won, moves, latencies in results]
+    latencies = sorted(
+        latency for won, moves, game_latencies in results
+        for latency in game_latencies
+    )
+    print(f"Games: {len(results)} in {seconds:.2f}s")
+    print(f"Win rate: {wins / len(results):.2%}")
+    print(f"Moves per game: {sum(moves) / len(moves):.1f}")
+    print("add_knowledge latency:")
+    for name, fraction in [("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("max", 1)]:
+        latency = percentile(latencies, fraction)
+        print(f"  {name}: {latency * 1000:.3f} ms")
+
+
+def simulate(games, height, width, mines, seed=0, processes=None,
+             bitboard=False, array=False):
+    """
+    Plays `games` games on a process pool, game `i` seeded with
+    `seed + i`, and returns a list of `(won, moves, latencies)` results,
+    one for each game, as returned by `play`.
+    """
+    tasks = [
+        (height, width, mines, seed + i, bitboard, array)
+        for i in range(games)
+    ]
+    with multiprocessing.Pool(processes) as pool:
+        return pool.starmap(play, tasks, chunksize=max(1, games // 100))
+
+
+def play(height, width, mines, seed, bitboard=False, array=False):
+    """
+    Plays one game of Minesweeper with the AI, seeded with `seed`.
+
+    Returns whether the AI won, the number of moves it made, and a list
+    of the seconds taken by each call to `add_knowledge`.
+    """
+    random.seed(seed)
+    if bitboard:
+        game = BitboardMinesweeper(height=height, width=width, mines=mines)
+        ai = BitboardMinesweeperAI(height=height, width=width, mines=mines)
+    else:
+        if array:
+            game = ArrayMinesweeper(height=height, width=width, mines=mines)
+        else:
+            game = Minesweeper(height=height, width=width, mines=mines)
+        ai = MinesweeperAI(height=height, width=width, mines=mines)
+
+    latencies = []
+    while len(ai.moves_made) < height * width - mines:
+
+        # Make a safe move if possible, otherwise guess
+        move = ai.make_safe_move()
+        if move is None:
+            move = ai.make_random_move()
+        if move is None or game.is_mine(move):
+            return False, len(ai.moves_made) + 1, latencies
+
+        start = time.perf_counter()
+        ai.add_knowledge(move, game.nearby_mines(move))
+        latencies.append(time.perf_counter() - start)
+
+    return True, len(ai.moves_made), latencies
+
+
+def percentile(values, fraction):
+    """
+    Returns the value at `fraction` of the way through sorted `values`.
+    """
+    if not values:
+        return 0
+    return values[min(int(fraction * len(values)), len(values) - 1)]
+
+
+if __name__ == "__main__":
+    main()
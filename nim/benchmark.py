@@ -0,0 +1,38 @@
+import random
+import sys
+import time
+
+from nim import ArrayNimAI, batch_train, fast_train, parallel_train, train
+
+
+def main():
+
+    # Check for proper usage
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python benchmark.py [games]")
+    games = int(sys.argv[1]) if len(sys.argv) == 2 else 10000
+
+    for name, trainer in trainers():
+        random.seed(0)
+        start = time.perf_counter()
+        trainer(games)
+        seconds = time.perf_counter() - start
+        print(f"{name:<24}{games / seconds:12.0f} games/s")
+
+
+def trainers():
+    """
+    Returns a list of `(name, trainer)` pairs, where `trainer(n)`
+    trains a new AI by playing `n` games against itself.
+    """
+    return [
+        ("train", lambda n: train(n, verbose=False)),
+        ("train, ArrayNimAI", lambda n: train(n, ArrayNimAI(), verbose=False)),
+        ("fast_train", lambda n: fast_train(n)),
+        ("parallel_train", lambda n: parallel_train(n)),
+        ("batch_train", lambda n: batch_train(n)),
+    ]
+
+
+if __name__ == "__main__":
+    main()
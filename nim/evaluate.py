@@ -0,0 +1,97 @@
+import argparse
+import itertools
+import math
+import random
+import time
+
+from nim import (
+    ARRAY_SIZE_LIMIT, ArrayNimAI, NimAI, array_size, fast_train,
+    optimal_actions, train
+)
+
+# Pile configurations evaluated by default, in increasing size
+CONFIGURATIONS = [
+    [1, 3, 5, 7],
+    [3, 5, 7, 9],
+    [2, 4, 6, 8, 10],
+    [1, 2, 3, 4, 5, 6, 7],
+    [4, 5, 6, 7, 8, 9],
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure how often a trained Nim AI plays an optimal move."
+    )
+    parser.add_argument("piles", type=int, nargs="*",
+                        help="initial pile sizes (default: several configurations)")
+    parser.add_argument("--games", type=int, nargs="+",
+                        default=[1000, 10000, 100000, 1000000],
+                        help="total training games to evaluate after")
+    parser.add_argument("--samples", type=int, default=10000,
+                        help="most positions to check in each evaluation")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for initial in [args.piles] if args.piles else CONFIGURATIONS:
+        states = math.prod(pile + 1 for pile in initial)
+
+        # Too big for a Q-table array, so learn only the pairs visited
+        tabular = array_size(initial) <= ARRAY_SIZE_LIMIT
+        if tabular:
+            print(f"Piles {initial}: {states} states, ArrayNimAI")
+        else:
+            print(f"Piles {initial}: {states} states, NimAI")
+
+        # Keep training the same AI, evaluating it after each total
+        random.seed(args.seed)
+        ai = ArrayNimAI(initial=initial) if tabular else NimAI()
+        played = 0
+        seconds = 0
+        for games in sorted(args.games):
+            start = time.perf_counter()
+            if tabular:
+                fast_train(games - played, ai)
+            else:
+                train(games - played, ai, initial, verbose=False)
+            seconds += time.perf_counter() - start
+            played = games
+            rate = optimal_move_rate(ai, initial, args.samples, args.seed)
+            print(f"    {games:>10} games {seconds:10.2f}s   optimal moves: {rate:.2%}")
+
+
+def optimal_move_rate(ai, initial, samples=None, seed=0):
+    """
+    Returns the fraction of winning positions reachable from piles
+    `initial` in which `ai` chooses a winning action when not exploring.
+
+    If `samples` is given and there are more positions than that,
+    only `samples` positions chosen at random with `seed` are checked.
+    """
+    positions = positions_from(initial, samples, seed)
+    optimal = winning = 0
+    for piles in positions:
+        actions = optimal_actions(piles)
+        if actions:
+            winning += 1
+            optimal += ai.choose_action(piles, epsilon=False) in actions
+    return optimal / winning if winning else 1
+
+
+def positions_from(initial, samples=None, seed=0):
+    """
+    Returns a list of the positions reachable from piles `initial`,
+    or of `samples` of them chosen at random with `seed` if that is
+    fewer.
+    """
+    if samples is None or math.prod(pile + 1 for pile in initial) <= samples:
+        return [
+            list(piles)
+            for piles in itertools.product(*[range(pile + 1) for pile in initial])
+        ]
+    rng = random.Random(seed)
+    return [[rng.randint(0, pile) for pile in initial] for _ in range(samples)]
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,27 @@
+import functools
+import itertools
 import math
+import multiprocessing
+import numpy as np
+import operator
+import os
 import random
+import struct
 import time
 
+# Largest number of pile states whose actions are remembered
+TRANSITION_CACHE_SIZE = 2 ** 16
+
+# Largest number of (state, action) pairs an ArrayNimAI may hold, since
+# it keeps several arrays of that size; bigger games need a NimAI
+ARRAY_SIZE_LIMIT = 2 ** 22
+
+# Header of a saved Q-table: magic bytes, format version, alpha,
+# epsilon, and number of piles, followed by the initial pile sizes
+Q_TABLE_MAGIC = b"NIMQ"
+Q_TABLE_VERSION = 1
+Q_TABLE_HEADER = struct.Struct("<4sIddI")
+
 
 class Nim():
 
@@ -25,12 +45,19 @@ class Nim():
 
         Action `(i, j)` represents the action of removing `j` items
         from pile `i` (where piles are 0-indexed).
+
+        The actions are returned as a read-only, set-like view that is
+        shared between calls for the same piles.
         """
-        actions = set()
-        for i, pile in enumerate(piles):
-            for j in range(1, pile + 1):
-                actions.add((i, j))
-        return actions
+        return transitions(tuple(piles)).keys()
+
+    @classmethod
+    def successor(cls, piles, action):
+        """
+        Nim.successor(piles, action) returns a tuple of the piles
+        left after taking action `(i, j)` in `piles`.
+        """
+        return transitions(tuple(piles))[action]
 
     @classmethod
     def other_player(cls, player):
@@ -70,6 +97,63 @@ class Nim():
             self.winner = self.player
 
 
+class NimBatch():
+
+    def __init__(self, games, initial=[1, 3, 5, 7]):
+        """
+        Initialize `games` game boards at once, one per row.
+        The batch has
+            - `piles`: an array of how many elements remain in each
+              pile, with a row for each game
+            - `player`: an array of 0 or 1 for whose turn it is in each game
+            - `winner`: an array of -1 (no winner yet), 0, or 1 for
+              who has won each game
+        """
+        self.piles = np.tile(np.array(initial, dtype=np.int64), (games, 1))
+        self.player = np.zeros(games, dtype=np.int64)
+        self.winner = np.full(games, -1, dtype=np.int64)
+
+    def move(self, games, piles, counts):
+        """
+        Make the move of taking `counts[k]` items from pile `piles[k]`
+        for the current player of game `games[k]`, for every `k`.
+
+        Returns an array of the reward for each move: -1 if it lost
+        that game, and 0 otherwise. The winner, who made the previous
+        move, is owed the opposite reward.
+        """
+
+        # Check for errors
+        if (self.winner[games] != -1).any():
+            raise Exception("Game already won")
+        elif ((piles < 0) | (piles >= self.piles.shape[1])).any():
+            raise Exception("Invalid pile")
+        elif ((counts < 1) | (counts > self.piles[games, piles])).any():
+            raise Exception("Invalid number of objects")
+
+        # Update piles
+        self.piles[games, piles] -= counts
+        self.player[games] ^= 1
+
+        # Check for winners
+        over = ~self.piles[games].any(axis=1)
+        self.winner[games[over]] = self.player[games[over]]
+        return -over.astype(np.int64)
+
+
+@functools.lru_cache(maxsize=TRANSITION_CACHE_SIZE)
+def transitions(piles):
+    """
+    Returns a dictionary mapping every action available in the tuple
+    `piles` to the tuple of piles left after taking it.
+    """
+    successors = dict()
+    for i, pile in enumerate(piles):
+        for j in range(1, pile + 1):
+            successors[i, j] = piles[:i] + (pile - j,) + piles[i + 1:]
+    return successors
+
+
 class NimAI():
 
     def __init__(self, alpha=0.5, epsilon=0.1):
@@ -81,6 +165,9 @@ class NimAI():
         pairs to a Q-value (a number).
          - `state` is a tuple of remaining piles, e.g. (1, 1, 4, 4)
          - `action` is a tuple `(i, j)` for an action
+
+        Unlike ArrayNimAI, a NimAI has no `save` or `load`: its
+        Q-values last only as long as the process that trained it.
         """
         self.q = dict()
         self.alpha = alpha
@@ -101,10 +188,7 @@ class NimAI():
         Return the Q-value for the state `state` and the action `action`.
         If no Q-value exists yet in `self.q`, return 0.
         """
-        if (tuple(state), action) not in self.q:
-            return 0
-        
-        return self.q[tuple(state), action]
+        return self.q.get((tuple(state), action), 0)
 
     def update_q_value(self, state, action, old_q, reward, future_rewards):
         """
@@ -133,11 +217,13 @@ class NimAI():
         Q-value in `self.q`. If there are no available actions in
         `state`, return 0.
         """
+        state = tuple(state)
         best_reward = 0
 
         for available_action in Nim.available_actions(state):
-            if self.get_q_value(state, available_action) > best_reward:
-                best_reward = self.get_q_value(state, available_action)
+            q_value = self.q.get((state, available_action), 0)
+            if q_value > best_reward:
+                best_reward = q_value
 
         return best_reward
 
@@ -156,33 +242,289 @@ class NimAI():
         If multiple actions have the same Q-value, any of those
         options is an acceptable return value.
         """
+        state = tuple(state)
         available_actions = Nim.available_actions(state)
 
         # Choose random available action
         if epsilon and random.random() <= self.epsilon:
-            return random.sample(available_actions, 1)[0]
-        
+            return random.choice(list(available_actions))
+
         # Otherwise choose best available action
         best_reward = -math.inf
 
         for available_action in available_actions:
-            if self.get_q_value(state, available_action) > best_reward:
-                best_reward = self.get_q_value(state, available_action)
+            q_value = self.q.get((state, available_action), 0)
+            if q_value > best_reward:
+                best_reward = q_value
                 best_action = available_action
 
         return best_action
 
-def train(n):
+
+class ArrayNimAI(NimAI):
+
+    def __init__(self, alpha=0.5, epsilon=0.1, initial=[1, 3, 5, 7]):
+        """
+        Initialize AI with a Q-learning array covering every game
+        that starts from piles `initial`, an alpha (learning) rate,
+        and an epsilon rate.
+
+        States and actions are numbered densely, so that
+        `self.q[state, action]` is the Q-value of a pair (a number).
+         - state `piles` has index `sum(piles[i] * self.strides[i])`
+         - action `(i, j)` has index `self.offsets[i] + j - 1`
+        Actions not available in a state have Q-value -inf, so a row
+        of `self.q` holds exactly the actions available in its state.
+
+        Called a move at a time, as by `train`, this is about as fast as
+        NimAI, since reading single NumPy elements costs about as much
+        as a dict lookup; the array pays off in `fast_train`,
+        `parallel_train` and `batch_train`, which work on whole tables.
+        """
+        self._configure(alpha, epsilon, initial)
+        self.q = np.where(self.available, 0.0, -np.inf)
+
+    def _configure(self, alpha, epsilon, initial):
+        """
+        Set the AI's rates and the numbering of its states and actions,
+        leaving the Q-table itself to the caller.
+        """
+        size = array_size(initial)
+        if size > ARRAY_SIZE_LIMIT:
+            raise Exception(
+                f"Piles {list(initial)} have {size} (state, action) pairs, "
+                f"more than the {ARRAY_SIZE_LIMIT} an ArrayNimAI can hold"
+            )
+
+        self.alpha = alpha
+        self.epsilon = epsilon
+        self.initial = list(initial)
+
+        # Number states in mixed radix, with the last pile varying fastest
+        self.strides = [1] * len(initial)
+        for i in reversed(range(len(initial) - 1)):
+            self.strides[i] = self.strides[i + 1] * (initial[i + 1] + 1)
+        self.offsets = [0] * len(initial)
+        for i in range(1, len(initial)):
+            self.offsets[i] = self.offsets[i - 1] + initial[i - 1]
+        self.actions = [
+            (i, j) for i, pile in enumerate(initial) for j in range(1, pile + 1)
+        ]
+        self.action_piles, self.action_counts = (
+            np.array(self.actions, dtype=np.int64).reshape(-1, 2).T
+        )
+
+    # The tables below are as large as the Q-table, so are only built
+    # when first used: a loaded AI that just plays never needs them all
+
+    @functools.cached_property
+    def indices(self):
+        """
+        Dict mapping each state, as a tuple, to its index in `self.q`.
+        """
+        states = itertools.product(*[range(pile + 1) for pile in self.initial])
+        return {piles: k for k, piles in enumerate(states)}
+
+    @functools.cached_property
+    def piles(self):
+        """
+        Array whose row `k` holds the piles of the state with index `k`.
+        """
+        states = itertools.product(*[range(pile + 1) for pile in self.initial])
+        return np.array(list(states), dtype=np.int64).reshape(-1, len(self.initial))
+
+    @functools.cached_property
+    def available(self):
+        """
+        Boolean array, true where an action is available in a state.
+        """
+        return self.piles[:, self.action_piles] >= self.action_counts
+
+    @functools.cached_property
+    def successors(self):
+        """
+        Array of the state reached by taking each action in each
+        state, or -1 where the action is not available.
+        """
+        states = np.arange(len(self.piles)).reshape(-1, 1)
+        strides = np.array(self.strides, dtype=np.int64)
+        return np.where(
+            self.available,
+            states - self.action_counts * strides[self.action_piles],
+            -1
+        )
+
+    def save(self, filename):
+        """
+        Save the AI's configuration and Q-table to `filename`, as a
+        header followed by the Q-values as little-endian float64s in
+        row-major order, starting at a multiple of 8 bytes.
+        """
+        header = Q_TABLE_HEADER.pack(
+            Q_TABLE_MAGIC, Q_TABLE_VERSION, self.alpha, self.epsilon,
+            len(self.initial)
+        ) + struct.pack(f"<{len(self.initial)}I", *self.initial)
+        header += bytes(-len(header) % 8)
+
+        # Write a new file and swap it in, as the old one may be mapped
+        with open(filename + ".tmp", "wb") as f:
+            f.write(header)
+            f.write(self.q.astype("<f8").tobytes())
+        os.replace(filename + ".tmp", filename)
+
+    @classmethod
+    def load(cls, filename, mmap_mode="c"):
+        """
+        Load an AI saved with `save` from `filename`.
+
+        The Q-table is memory-mapped rather than read in, with
+        `mmap_mode` as for `numpy.memmap`: by default, changes made
+        by further training stay in memory and the file is untouched.
+        """
+        with open(filename, "rb") as f:
+            header = f.read(Q_TABLE_HEADER.size)
+            if len(header) < Q_TABLE_HEADER.size:
+                raise Exception("Not a Nim Q-table file")
+            magic, version, alpha, epsilon, n = Q_TABLE_HEADER.unpack(header)
+            if magic != Q_TABLE_MAGIC:
+                raise Exception("Not a Nim Q-table file")
+            if version != Q_TABLE_VERSION:
+                raise Exception(f"Unsupported Nim Q-table version {version}")
+            initial = list(struct.unpack(f"<{n}I", f.read(4 * n)))
+
+        # Build the AI around the mapped Q-table, without a table of its own
+        ai = cls.__new__(cls)
+        ai._configure(alpha, epsilon, initial)
+        offset = Q_TABLE_HEADER.size + 4 * n
+        offset += -offset % 8
+        ai.q = np.memmap(
+            filename, dtype="<f8", mode=mmap_mode, offset=offset,
+            shape=(math.prod(pile + 1 for pile in initial), len(ai.actions))
+        )
+        return ai
+
+    def state_index(self, state):
+        """
+        Return the index of the state `state` in `self.q`.
+        """
+        return self.indices[tuple(state)]
+
+    def state_indices(self, piles):
+        """
+        Return an array of the indices in `self.q` of the states given
+        as rows of the 2-D array `piles`.
+        """
+        return piles @ np.array(self.strides, dtype=np.int64)
+
+    def action_index(self, action):
+        """
+        Return the index of the action `(i, j)` in `self.q`.
+        """
+        i, j = action
+        return self.offsets[i] + j - 1
+
+    def get_q_value(self, state, action):
+        """
+        Return the Q-value for the state `state` and the action `action`.
+        """
+        i, j = action
+        return self.q.item(self.indices[tuple(state)], self.offsets[i] + j - 1)
+
+    def update_q_value(self, state, action, old_q, reward, future_rewards):
+        """
+        Update the Q-value for the state `state` and the action `action`
+        given the previous Q-value `old_q`, a current reward `reward`,
+        and an estimate of future rewards `future_rewards`.
+        """
+        self.q[self.indices[tuple(state)], self.action_index(action)] = (
+            old_q + self.alpha * (reward + future_rewards - old_q)
+        )
+
+    def best_future_reward(self, state):
+        """
+        Given a state `state`, return the maximum of the Q-values of
+        all actions available in it, or 0 if that is higher or there
+        are no available actions.
+        """
+        return max(0.0, max(self.q[self.indices[tuple(state)]].tolist()))
+
+    def choose_action(self, state, epsilon=True):
+        """
+        Given a state `state`, return an action `(i, j)` to take.
+
+        If `epsilon` is `False`, then return the best action
+        available in the state, otherwise with probability
+        `self.epsilon` choose a random available action instead.
+        """
+        index = self.indices[tuple(state)]
+
+        # Choose random available action
+        if epsilon and random.random() <= self.epsilon:
+            return self.actions[random.choice(np.flatnonzero(self.q[index] > -np.inf))]
+
+        # Otherwise choose best available action
+        values = self.q[index].tolist()
+        return self.actions[values.index(max(values))]
+
+    def choose_actions(self, states, rng, epsilon=True):
+        """
+        Given an array of state indices `states`, return an array of
+        the index of an action to take in each, as `choose_action`
+        would, drawing random numbers from the NumPy generator `rng`.
+        """
+        actions = self.q[states].argmax(axis=1)
+
+        # Choose random available actions, by giving each available
+        # action a random score and taking the highest
+        if epsilon:
+            explore = rng.random(len(states)) <= self.epsilon
+            scores = rng.random((explore.sum(), self.q.shape[1]))
+            scores[~self.available[states[explore]]] = -1
+            actions[explore] = scores.argmax(axis=1)
+
+        return actions
+
+    def update_q_values(self, states, actions, targets):
+        """
+        Move the Q-value of each pair of indices `(states[k], actions[k])`
+        `alpha` of the way towards `targets[k]`, the sum of the reward
+        and estimated future rewards for that pair.
+
+        Pairs given more than once move towards the mean of their targets.
+        """
+        pairs = states * self.q.shape[1] + actions
+        pairs, inverse, counts = np.unique(
+            pairs, return_inverse=True, return_counts=True
+        )
+        targets = np.bincount(inverse, weights=targets) / counts
+        states, actions = np.divmod(pairs, self.q.shape[1])
+        self.q[states, actions] += self.alpha * (targets - self.q[states, actions])
+
+
+def array_size(initial):
+    """
+    Returns the number of (state, action) pairs in an ArrayNimAI for
+    games starting from piles `initial`.
+    """
+    return math.prod(pile + 1 for pile in initial) * sum(initial)
+
+
+def train(n, player=None, initial=[1, 3, 5, 7], verbose=True):
     """
-    Train an AI by playing `n` games against itself.
+    Train an AI by playing `n` games against itself,
+    each starting from piles `initial`.
+    If `player` is given, train that AI rather than a new NimAI.
+    If `verbose` is false, train without printing progress.
     """
 
-    player = NimAI()
+    if player is None:
+        player = NimAI()
 
     # Play n games
     for i in range(n):
-        print(f"Playing training game {i + 1}")
-        game = Nim()
+        if verbose:
+            print(f"Playing training game {i + 1}")
+        game = Nim(initial)
 
         # Keep track of last move made by either player
         last = {
@@ -194,8 +536,8 @@ def train(n):
         while True:
 
             # Keep track of current state and action
-            state = game.piles.copy()
-            action = player.choose_action(game.piles)
+            state = tuple(game.piles)
+            action = player.choose_action(state)
 
             # Keep track of last state and action
             last[game.player]["state"] = state
@@ -203,7 +545,7 @@ def train(n):
 
             # Make move
             game.move(action)
-            new_state = game.piles.copy()
+            new_state = Nim.successor(state, action)
 
             # When game is over, update Q values with rewards
             if game.winner is not None:
@@ -225,15 +567,217 @@ def train(n):
                     0
                 )
 
-    print("Done training")
+    if verbose:
+        print("Done training")
 
     # Return the trained AI
     return player
 
 
-def play(ai, human_player=None):
+def fast_train(n, player=None, interval=None):
+    """
+    Train an ArrayNimAI by playing `n` games against itself, learning
+    exactly as `train` does but on state and action indices, with no
+    Nim objects or pile lists made along the way.
+    If `player` is given, train that AI rather than a new ArrayNimAI.
+    If `interval` is given, report progress every `interval` games.
+    """
+
+    if player is None:
+        player = ArrayNimAI()
+
+    # Work on plain lists, which are faster than NumPy for single elements
+    q = player.q.tolist()
+    successors = player.successors.tolist()
+    available = [np.flatnonzero(row).tolist() for row in player.available]
+    alpha = player.alpha
+    epsilon = player.epsilon
+    initial = player.state_index(player.initial)
+
+    # Play n games
+    for i in range(n):
+        if interval and i % interval == 0:
+            print(f"Playing training games {i + 1} to {min(i + interval, n)}")
+        state = initial
+
+        # Keep track of last move made by the player not moving now
+        last_state = last_action = None
+
+        # Game loop
+        while True:
+
+            # Choose random or best available action, as in choose_action
+            values = q[state]
+            if random.random() <= epsilon:
+                action = random.choice(available[state])
+            else:
+                action = values.index(max(values))
+
+            # Make move
+            new_state = successors[state][action]
+
+            # When game is over, update Q values with rewards
+            if new_state == 0:
+                values[action] += alpha * (-1 - values[action])
+                if last_state is not None:
+                    values = q[last_state]
+                    values[last_action] += alpha * (1 - values[last_action])
+                break
+
+            # If game is continuing, no rewards yet
+            elif last_state is not None:
+                future = max(0, max(q[new_state]))
+                values = q[last_state]
+                values[last_action] += alpha * (future - values[last_action])
+
+            last_state = state
+            last_action = action
+            state = new_state
+
+    player.q[:] = q
+    if interval:
+        print("Done training")
+
+    # Return the trained AI
+    return player
+
+
+def batch_train(n, player=None, batch_size=1000, interval=None):
+    """
+    Train an ArrayNimAI by playing `n` games against itself,
+    `batch_size` games at a time, in a NimBatch. Every turn, actions
+    for all unfinished games are chosen at once, and the Q-values for
+    all their moves updated at once, with the same rewards as `train`.
+    If `player` is given, train that AI rather than a new ArrayNimAI.
+    If `interval` is given, report progress about every `interval` games.
+    """
+
+    if player is None:
+        player = ArrayNimAI()
+    rng = np.random.default_rng(random.getrandbits(64))
+
+    # Play n games, a batch at a time
+    reported = 0
+    for played in range(0, n, batch_size):
+        if interval and played >= reported:
+            reported = min(played + interval, n)
+            print(f"Playing training games {played + 1} to {reported}")
+        batch = NimBatch(min(batch_size, n - played), player.initial)
+
+        # Keep track of last move made in each game by the player not moving now
+        games = np.arange(len(batch.winner))
+        last_states = np.full(len(games), -1)
+        last_actions = np.zeros(len(games), dtype=np.int64)
+
+        # Game loop, over games still being played
+        while len(games):
+
+            # Make moves
+            states = player.state_indices(batch.piles[games])
+            actions = player.choose_actions(states, rng)
+            rewards = batch.move(
+                games, player.action_piles[actions], player.action_counts[actions]
+            )
+            new_states = player.state_indices(batch.piles[games])
+            future = np.maximum(0, player.q[new_states].max(axis=1))
+
+            # Update Q values of moves that ended their games, and
+            # of the moves before this one, with no reward unless
+            # their player has just won
+            over = rewards != 0
+            before = last_states[games] != -1
+            player.update_q_values(
+                np.concatenate([states[over], last_states[games[before]]]),
+                np.concatenate([actions[over], last_actions[games[before]]]),
+                np.concatenate([rewards[over], -rewards[before] + future[before]])
+            )
+
+            last_states[games] = states
+            last_actions[games] = actions
+            games = games[~over]
+
+    if interval:
+        print("Done training")
+
+    # Return the trained AI
+    return player
+
+
+def parallel_train(n, player=None, processes=None, sync_interval=10000, seed=0):
+    """
+    Train an ArrayNimAI by playing `n` games against itself, shared out
+    between worker processes that each play with their own seed.
+
+    Every worker starts from the same Q-table and plays up to
+    `sync_interval` games with `fast_train`, after which the AI's
+    Q-table becomes the average of the workers' tables, and the
+    next round starts from that.
+    If `player` is given, train that AI rather than a new ArrayNimAI.
+    """
+
+    if player is None:
+        player = ArrayNimAI()
+    processes = processes or multiprocessing.cpu_count()
+
+    with multiprocessing.Pool(processes) as pool:
+        played = 0
+        while played < n:
+
+            # Share the next round's games out as evenly as possible
+            games = min(processes * sync_interval, n - played)
+            shards = [
+                games // processes + (k < games % processes)
+                for k in range(processes)
+            ]
+            tasks = [
+                (player, shard, seed + played + k)
+                for k, shard in enumerate(shards) if shard
+            ]
+
+            # Merge workers' Q-tables
+            tables = pool.starmap(train_shard, tasks)
+            player.q = np.mean(tables, axis=0)
+            played += games
+
+    return player
+
+
+def train_shard(player, n, seed):
+    """
+    Train a copy of `player` with `fast_train` for `n` games, seeded
+    with `seed`, and return its Q-table.
+    """
+    random.seed(seed)
+    return fast_train(n, player).q
+
+
+def is_losing(piles):
+    """
+    Returns whether the player to move in `piles` loses against perfect
+    play. The player who takes the last object loses, so once no pile
+    has more than one object, the player to move loses when an odd
+    number of piles are left; otherwise they lose when the nim-sum
+    (the XOR of all the pile sizes) is 0.
+    """
+    if all(pile <= 1 for pile in piles):
+        return sum(piles) % 2 == 1
+    return functools.reduce(operator.xor, piles, 0) == 0
+
+
+def optimal_actions(piles):
+    """
+    Returns the set of actions in `piles` that leave the other player
+    in a losing position, which is empty if every action loses.
+    """
+    return {
+        action for action, successor in transitions(tuple(piles)).items()
+        if is_losing(successor)
+    }
+
+
+def play(ai, human_player=None, initial=[1, 3, 5, 7]):
     """
-    Play human game against the AI.
+    Play human game against the AI, starting from piles `initial`.
     `human_player` can be set to 0 or 1 to specify whether
     human player moves first or second.
     """
@@ -243,7 +787,7 @@ def play(ai, human_player=None):
         human_player = random.randint(0, 1)
 
     # Create new game
-    game = Nim()
+    game = Nim(initial)
 
     # Game loop
     while True:
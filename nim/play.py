@@ -1,4 +1,30 @@
-from nim import train, play
+import os
+import sys
 
-ai = train(10000)
-play(ai)
+from nim import ArrayNimAI, fast_train, play
+
+# File the trained AI is kept in between sessions; only an ArrayNimAI
+# can be saved, so games too large for one cannot be kept this way
+MODEL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "model.nimq")
+
+# Number of games to train a new AI for
+TRAINING_GAMES = 10000
+
+# Check for proper usage
+if len(sys.argv) > 2:
+    sys.exit("Usage: python play.py [training games]")
+
+# Start from the saved AI if there is one, otherwise train a new one
+if os.path.exists(MODEL):
+    ai = ArrayNimAI.load(MODEL)
+    games = int(sys.argv[1]) if len(sys.argv) == 2 else 0
+else:
+    ai = ArrayNimAI()
+    games = int(sys.argv[1]) if len(sys.argv) == 2 else TRAINING_GAMES
+
+# Train for any extra games, and save the result for next time
+if games:
+    ai = fast_train(games, ai, interval=max(1, games // 10))
+    ai.save(MODEL)
+
+play(ai, initial=ai.initial)
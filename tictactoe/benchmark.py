@@ -0,0 +1,46 @@
+import time
+
+import tictactoe as ttt
+
+
+def main():
+
+    # Boards after the first few moves of a game
+    boards = [ttt.initial_state()]
+    for move in [(0, 0), (1, 1), (2, 2)]:
+        boards.append(ttt.result(boards[-1], move))
+
+    for board in boards:
+        moves = 9 - len(ttt.actions(board))
+        print(f"After {moves} moves")
+        for name, search in searches():
+            ttt.nodes = 0
+            ttt.transpositions.clear()
+            start = time.perf_counter()
+            search(board)
+            seconds = time.perf_counter() - start
+            print(f"    {name:<12}{ttt.nodes:10} nodes{seconds * 1000:10.2f} ms")
+
+
+def searches():
+    """
+    Returns a list of `(name, search)` pairs, where `search(board)`
+    works out the value of the board for the player to move.
+    """
+    return [
+        ("minimax", plain_value),
+        ("alpha-beta", lambda board: ttt.alpha_beta(ttt.encode(board))),
+    ]
+
+
+def plain_value(board):
+    """
+    Returns the value of the board by searching the whole game tree.
+    """
+    if ttt.player(board) == ttt.X:
+        return ttt.max_value(board)
+    return ttt.min_value(board)
+
+
+if __name__ == "__main__":
+    main()
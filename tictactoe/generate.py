@@ -0,0 +1,56 @@
+import sys
+
+import tictactoe as ttt
+
+
+def main():
+
+    # Check for proper usage
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python generate.py [output]")
+    filename = sys.argv[1] if len(sys.argv) == 2 else ttt.MOVES_FILE
+
+    moves = solve()
+    save(moves, filename)
+    print(f"Saved best moves for {len(moves)} positions to {filename}")
+
+
+def solve():
+    """
+    Returns a dictionary mapping the canonical encoding of every
+    position reachable in a game, where the game is not over, to the
+    cell 3 * i + j of the best move on the canonical board.
+    """
+    moves = dict()
+    seen = set()
+    frontier = [ttt.encode(ttt.initial_state())]
+    while frontier:
+        board = frontier.pop()
+        if board in seen or ttt.bits_terminal(board):
+            continue
+        seen.add(board)
+        frontier.extend(ttt.bits_result(board, cell) for cell in ttt.bits_actions(board))
+
+        # Solve one board of each set of symmetric ones
+        key, symmetry = ttt.canonical_symmetry(board)
+        if key not in moves:
+            table = ttt.SYMMETRY_TABLES[symmetry]
+            canonical = (table[board[0]], table[board[1]])
+            i, j = ttt.search(ttt.decode(canonical))
+            moves[key] = 3 * i + j
+
+    return moves
+
+
+def save(moves, filename):
+    """
+    Writes `moves` to `filename` in the format read by ttt.load_moves.
+    """
+    with open(filename, "wb") as f:
+        f.write(ttt.MOVES_HEADER.pack(ttt.MOVES_MAGIC, ttt.MOVES_VERSION, len(moves)))
+        for key, cell in sorted(moves.items()):
+            f.write((key << 4 | cell).to_bytes(3, "little"))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,13 +2,69 @@
 Tic Tac Toe Player
 """
 
+import functools
 import math
 import copy
+import os
+import struct
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# A compact board is a pair of 9-bit masks `(x, o)` of the cells
+# holding X and O, where bit 3 * i + j stands for cell (i, j)
+FULL = 0b111111111
+
+# Masks of the 8 rows, columns and diagonals
+LINES = [
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100,
+]
+
+# Cells in the order the search tries them: centre, corners, then edges
+MOVE_ORDER = [4, 0, 2, 6, 8, 1, 3, 5, 7]
+
+# Cells of the board under each of its 8 rotations and reflections
+SYMMETRIES = [
+    [transform(i, j) for i in range(3) for j in range(3)]
+    for transform in [
+        lambda i, j: (i, j), lambda i, j: (j, 2 - i),
+        lambda i, j: (2 - i, 2 - j), lambda i, j: (2 - j, i),
+        lambda i, j: (i, 2 - j), lambda i, j: (2 - i, j),
+        lambda i, j: (j, i), lambda i, j: (2 - j, 2 - i),
+    ]
+]
+
+# Every 9-bit mask after each rotation or reflection of the board
+SYMMETRY_TABLES = [
+    [
+        sum(1 << k for k, (i, j) in enumerate(cells) if mask >> (3 * i + j) & 1)
+        for mask in range(FULL + 1)
+    ]
+    for cells in SYMMETRIES
+]
+
+# File of the best move in every position, made by generate.py:
+# a header of magic bytes, format version and number of positions,
+# then a 3-byte little-endian `canonical(board) << 4 | cell` for each
+MOVES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "moves.bin")
+MOVES_MAGIC = b"TTTM"
+MOVES_VERSION = 1
+MOVES_HEADER = struct.Struct("<4sII")
+
+# Kinds of value stored in the transposition table
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Values of positions already searched, by canonical encoding
+transpositions = dict()
+
+# Number of positions visited by the search, for benchmarking
+nodes = 0
+
 
 def initial_state():
     """
@@ -135,31 +191,248 @@ def minimax(board):
     Returns the optimal action for the current player on the board.
     """
     
-    if terminal(board):
+    compact = encode(board)
+    if bits_terminal(compact):
+        return None
+
+    # Look the move up if every position has been solved already,
+    # turning it back from the canonical board to this one
+    moves = load_moves()
+    if moves is not None:
+        key, symmetry = canonical_symmetry(compact)
+        if key in moves:
+            return SYMMETRIES[symmetry][moves[key]]
+
+    return search(board)
+
+
+def search(board):
+    """
+    Returns the optimal action for the current player on the board,
+    working it out by searching the game tree.
+    """
+
+    compact = encode(board)
+    if bits_terminal(compact):
         return None
 
-    if player(board) == X:
+    # Each move only needs searching far enough to tell whether it
+    # beats the best so far, so ties go to the first move, as before
+    if bits_player(compact) == X:
         best_v = -math.inf
         for move in actions(board):
-            max_v = min_value(result(board, move))
+            max_v = alpha_beta(bits_result(compact, 3 * move[0] + move[1]), best_v, math.inf)
             if max_v > best_v:
                 best_v = max_v
                 best_move = move
     
-    elif player(board) == O:
+    else:
         best_v = math.inf
         for move in actions(board):
-            min_v = max_value(result(board, move)) 
+            min_v = alpha_beta(bits_result(compact, 3 * move[0] + move[1]), -math.inf, best_v)
             if min_v < best_v:
                 best_v = min_v
                 best_move = move
     return best_move 
 
 
+def alpha_beta(board, alpha=-math.inf, beta=math.inf):
+    """
+    Returns the utility of the compact board with best play, if it is
+    between `alpha` and `beta`. Otherwise returns a bound on it that
+    is at most `alpha` or at least `beta`, respectively.
+    """
+    global nodes
+    nodes += 1
+
+    if bits_terminal(board):
+        return bits_utility(board)
+
+    # Use what is known about this position, or one symmetric to it
+    key = canonical(board)
+    if key in transpositions:
+        value, kind = transpositions[key]
+        if kind == EXACT:
+            return value
+        elif kind == LOWER:
+            alpha = max(alpha, value)
+        else:
+            beta = min(beta, value)
+        if alpha >= beta:
+            return value
+    window = alpha, beta
+
+    # Stop searching once the other player would avoid this position
+    if bits_player(board) == X:
+        v = -math.inf
+        for move in bits_actions(board):
+            v = max(v, alpha_beta(bits_result(board, move), alpha, beta))
+            alpha = max(alpha, v)
+            if alpha >= beta:
+                break
+    else:
+        v = math.inf
+        for move in bits_actions(board):
+            v = min(v, alpha_beta(bits_result(board, move), alpha, beta))
+            beta = min(beta, v)
+            if alpha >= beta:
+                break
+
+    # Remember the value, or which side of the window it fell
+    if v <= window[0]:
+        transpositions[key] = (v, UPPER)
+    elif v >= window[1]:
+        transpositions[key] = (v, LOWER)
+    else:
+        transpositions[key] = (v, EXACT)
+    return v
+
+
+def canonical(board):
+    """
+    Returns an integer encoding of the compact board, the same for all
+    boards that are rotations or reflections of each other.
+    """
+    x, o = board
+    return min(table[x] | table[o] << 9 for table in SYMMETRY_TABLES)
+
+
+def canonical_symmetry(board):
+    """
+    Returns the canonical encoding of the compact board, and the index
+    in SYMMETRIES of the rotation or reflection that gives it.
+    """
+    x, o = board
+    return min(
+        (table[x] | table[o] << 9, k)
+        for k, table in enumerate(SYMMETRY_TABLES)
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def load_moves(filename=MOVES_FILE):
+    """
+    Returns a dictionary mapping the canonical encoding of every
+    position in `filename` to the cell 3 * i + j of its best move on
+    the canonical board, or None if there is no such file.
+    """
+    try:
+        with open(filename, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+
+    if len(data) < MOVES_HEADER.size:
+        raise Exception("Not a tic-tac-toe moves file")
+    magic, version, count = MOVES_HEADER.unpack_from(data)
+    if magic != MOVES_MAGIC:
+        raise Exception("Not a tic-tac-toe moves file")
+    if version != MOVES_VERSION:
+        raise Exception(f"Unsupported tic-tac-toe moves version {version}")
+
+    moves = dict()
+    for k in range(count):
+        start = MOVES_HEADER.size + 3 * k
+        entry = int.from_bytes(data[start:start + 3], "little")
+        moves[entry >> 4] = entry & 0b1111
+    return moves
+
+
+def encode(board):
+    """
+    Returns the compact board `(x, o)` for the board.
+    """
+    x = o = 0
+    for i in range(3):
+        for j in range(3):
+            if board[i][j] == X:
+                x |= 1 << (3 * i + j)
+            elif board[i][j] == O:
+                o |= 1 << (3 * i + j)
+    return x, o
+
+
+def decode(board):
+    """
+    Returns the board for the compact board `(x, o)`.
+    """
+    x, o = board
+    return [
+        [X if x >> (3 * i + j) & 1 else O if o >> (3 * i + j) & 1 else EMPTY
+         for j in range(3)]
+        for i in range(3)
+    ]
+
+
+def bits_player(board):
+    """
+    Returns player who has the next turn on a compact board.
+    """
+    x, o = board
+    return O if x.bit_count() > o.bit_count() else X
+
+
+def bits_actions(board):
+    """
+    Returns list of the empty cells 3 * i + j of a compact board,
+    in the order the search should try them.
+    """
+    taken = board[0] | board[1]
+    return [cell for cell in MOVE_ORDER if not taken >> cell & 1]
+
+
+def bits_result(board, cell):
+    """
+    Returns the compact board that results from making a move
+    in cell 3 * i + j of the compact board.
+    """
+    x, o = board
+    if not 0 <= cell < 9 or (x | o) >> cell & 1:
+        raise Exception("Invalid move")
+    if x.bit_count() > o.bit_count():
+        return x, o | 1 << cell
+    return x | 1 << cell, o
+
+
+def bits_winner(board):
+    """
+    Returns the winner of the game on a compact board, if there is one.
+    """
+    x, o = board
+    for line in LINES:
+        if x & line == line:
+            return X
+        if o & line == line:
+            return O
+    return None
+
+
+def bits_terminal(board):
+    """
+    Returns True if game is over on a compact board, False otherwise.
+    """
+    return board[0] | board[1] == FULL or bits_winner(board) is not None
+
+
+def bits_utility(board):
+    """
+    Returns 1 if X has won the game on a compact board, -1 if O has won,
+    0 otherwise.
+    """
+    winner = bits_winner(board)
+    if winner == X:
+        return 1
+    if winner == O:
+        return -1
+    return 0
+
+
 def min_value(board):
     """
     Returns the minimum utility of the current board.
     """
+    global nodes
+    nodes += 1
 
     if terminal(board):
         return utility(board)
@@ -174,6 +447,8 @@ def max_value(board):
     """
     Returns the maximum utility of the current board.
     """
+    global nodes
+    nodes += 1
 
     if terminal(board):
         return utility(board)